@@ -0,0 +1,5 @@
+"""Performance benchmarks for the bookmarks API.
+
+Run each benchmark as a module from the repository root, e.g.
+``python -m benchmarks.bench_short_codes``.
+"""
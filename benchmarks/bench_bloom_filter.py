@@ -0,0 +1,110 @@
+"""Benchmark redirect misses with and without the Bloom filter front.
+
+Seeds ``--rows`` bookmarks, backdates them so the whole table is below
+the filter's sequence floor (as in a long-running deployment), then times
+``--requests`` redirects to unknown codes: scanner paths, random codes of
+existing lengths and typos of real codes. Every miss is run with
+``BLOOM_FILTER_ENABLED`` off and on; the figures include the SQL statement
+count per request and the filter's own counters.
+
+    python -m benchmarks.bench_bloom_filter --rows 100000 --requests 5000
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, select, update
+
+from benchmarks.common import build_app, summarize
+from benchmarks.harness import seed
+from src.bloom import bookmark_filter
+from src.database import Bookmark, db
+from src.shortcodes import ALPHABET
+
+SCANNER_PATHS = ("wp-login.php", ".env", "xmlrpc.php", "admin", "phpmyadmin", "robots.txt")
+
+
+def miss_paths(codes, count):
+    """Return ``count`` redirect paths that match no bookmark."""
+    known = set(codes)
+    paths = []
+    while len(paths) < count:
+        kind = len(paths) % 3
+        if kind == 0:
+            path = random.choice(SCANNER_PATHS)
+        elif kind == 1:
+            path = "".join(random.choices(ALPHABET, k=random.choice((3, 4))))
+        else:
+            code = random.choice(codes)
+            position = random.randrange(len(code))
+            path = code[:position] + random.choice(ALPHABET) + code[position + 1:]
+        if path not in known:
+            paths.append("/" + path)
+    return paths
+
+
+def bench(path, paths, enabled):
+    """Return a latency summary for ``paths`` with the filter on or off."""
+    app = build_app(path, PASSWORD_HASH_WORKERS=0, BLOOM_FILTER_ENABLED=enabled)
+    statements = []
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute",
+                     lambda *args: statements.append(1))
+    client = app.test_client()
+    if enabled:
+        # The first lookup starts the background build; wait for it.
+        client.get("/" + SCANNER_PATHS[0])
+        while not bookmark_filter.stats()["ready"]:
+            time.sleep(0.05)
+    statements.clear()
+    latencies = []
+    start = time.perf_counter()
+    for request_path in paths:
+        began = time.perf_counter()
+        client.get(request_path)
+        latencies.append(time.perf_counter() - began)
+    result = {**summarize(latencies, time.perf_counter() - start),
+              "sql_per_request": len(statements) / len(paths)}
+    if enabled:
+        result["filter"] = {key: value for key, value in bookmark_filter.stats().items()
+                            if key in ("bytes", "hashes", "code_misses", "code_bypasses",
+                                       "false_positives", "build_seconds",
+                                       "code_false_positive_rate")}
+    return result
+
+
+def main():
+    """Run with the filter off and on and print JSON results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=1234)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        app = build_app(path, PASSWORD_HASH_WORKERS=0, BLOOM_FILTER_ENABLED=False)
+        seed(app, args.rows, 1, "pbkdf2:sha256:1000")
+        with app.app_context():
+            db.session.execute(update(Bookmark).values(
+                created_at=datetime.now() - timedelta(days=1)
+            ))
+            db.session.commit()
+            codes = db.session.scalars(select(Bookmark.short_url)).all()
+        paths = miss_paths(codes, args.requests)
+
+        results = {
+            "rows": args.rows,
+            "filter_off": bench(path, paths, False),
+            "filter_on": bench(path, paths, True),
+        }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Benchmark response compression for large list, stats and export payloads.
+
+Seeds ``--rows`` bookmarks and fetches each payload ``--requests`` times
+per encoding: once with the compressed-body cache off (every request runs
+the view and compresses) and once with it on (repeat requests are served
+from the cache). Reports bytes on the wire, server-side p50 latency and the
+transfer time that size implies at ``--mbps``.
+
+    python -m benchmarks.bench_compression --rows 20000 --mbps 2
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.common import build_app, summarize
+from benchmarks.harness import prepare, seed
+from src.compress import CODECS
+
+PAYLOADS = {
+    "list_100": "/api/v1/bookmarks/?page=1&per_page=100",
+    "stats_all": "/api/v1/bookmarks/stats?top=10",
+    "export_ndjson": "/api/v1/bookmarks/export?format=ndjson",
+}
+
+
+def bench(path, headers, requests, mbps, cache_bytes):
+    """Return per payload and encoding figures for one cache setting."""
+    app = build_app(path, PASSWORD_HASH_WORKERS=0, COMPRESS_CACHE_MAX_BYTES=cache_bytes)
+    client = app.test_client()
+    results = {}
+    for name, url in PAYLOADS.items():
+        for encoding in ("identity", *CODECS):
+            latencies = []
+            size = 0
+            start = time.perf_counter()
+            for _ in range(requests):
+                began = time.perf_counter()
+                response = client.get(url, headers={**headers, "Accept-Encoding": encoding})
+                size = len(response.get_data())
+                latencies.append(time.perf_counter() - began)
+            summary = summarize(latencies, time.perf_counter() - start)
+            results[f"{name}/{encoding}"] = {
+                "bytes": size,
+                "p50_ms": summary["p50_ms"],
+                "transfer_ms": size * 8 / (mbps * 1000),
+            }
+    return results
+
+
+def main():
+    """Run with the cache off and on and print JSON results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--mbps", type=float, default=2.0,
+                        help="client bandwidth used for the transfer estimate")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        app = build_app(path, PASSWORD_HASH_WORKERS=0)
+        seed(app, args.rows, 1, "pbkdf2:sha256:1000")
+        headers = prepare(app, args.rows)["headers"]
+        results = {
+            "rows": args.rows,
+            "cache_off": bench(path, headers, args.requests, args.mbps, 0),
+            "cache_on": bench(path, headers, args.requests, args.mbps, 32 * 1024 * 1024),
+        }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
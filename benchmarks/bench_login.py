@@ -0,0 +1,82 @@
+"""Benchmark login throughput under concurrency.
+
+Registers ``--users`` accounts, then fires ``--requests`` logins from
+``--concurrency`` threads for each password hashing pool size given in
+``--workers`` (0 hashes inline on the request thread).
+
+    python -m benchmarks.bench_login --workers 0 2 4 --concurrency 16
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+
+from benchmarks.common import build_app, summarize
+
+
+def run(workers, args, tmp):
+    """Return login figures for one hashing pool size."""
+    app = build_app(
+        os.path.join(tmp, f"login-{workers}.db"),
+        PASSWORD_HASH_METHOD=args.method,
+        PASSWORD_HASH_WORKERS=workers,
+        PASSWORD_HASH_QUEUE_DEPTH=args.concurrency * 2,
+    )
+    client = app.test_client()
+    for i in range(args.users):
+        client.post("/api/v1/auth/register", json={
+            "username": f"bench{i}", "email": f"bench{i}@example.com",
+            "password": "benchmark-password",
+        })
+
+    latencies = []
+    failures = []
+    lock = threading.Lock()
+    per_thread = args.requests // args.concurrency
+
+    def worker(offset):
+        thread_client = app.test_client()
+        for i in range(per_thread):
+            user = (offset + i) % args.users
+            start = time.perf_counter()
+            response = thread_client.post("/api/v1/auth/login", json={
+                "email": f"bench{user}@example.com",
+                "password": "benchmark-password",
+            })
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                if response.status_code != 200:
+                    failures.append(response.status_code)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(args.concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    return {"workers": workers, "failures": len(failures), **summarize(latencies, elapsed)}
+
+
+def main():
+    """Run the benchmark and print JSON results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 2, 4])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=320)
+    parser.add_argument("--users", type=int, default=16)
+    parser.add_argument("--method", default="pbkdf2:sha256:100000")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = [run(workers, args, tmp) for workers in args.workers]
+    print(json.dumps({"benchmark": "login", "method": args.method,
+                      "concurrency": args.concurrency, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
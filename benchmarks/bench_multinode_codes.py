@@ -0,0 +1,147 @@
+"""Check short code uniqueness and scaling across independent app nodes.
+
+Starts ``--workers`` processes (spawned, so nothing is shared but the
+database file), each building its own app with ``create_app`` as a
+separate node behind a load balancer would. All nodes then hand out codes
+at once, either allocating only (``--mode allocate``) or through the ORM
+insert path of ``POST /api/v1/bookmarks/`` (``--mode insert``). The run
+fails if any code is handed out twice or any insert hits a unique
+violation, and reports throughput and scaling efficiency per worker count
+against the single-worker run.
+
+Allocation only coordinates once per block, so it scales with cores.
+Inserts into one SQLite file are bounded by its single writer; point
+``--uri`` at a server database to measure insert scaling.
+
+    python -m benchmarks.bench_multinode_codes --workers 1 2 4 8 --count 20000
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+
+from benchmarks.common import BENCH_JWT_SECRET
+from src import create_app
+from src.database import Bookmark, User, db
+from src.shortcodes import short_codes
+
+
+def node_config(uri, block_size):
+    """Return the app config for one benchmark node."""
+    return {
+        "SECRET_KEY": "bench",
+        "JWT_SECRET_KEY": BENCH_JWT_SECRET,
+        "SQLALCHEMY_DATABASE_URI": uri,
+        "SQLALCHEMY_TRACK_MODIFICATIONS": False,
+        "SHORT_CODE_BLOCK_SIZE": block_size,
+        "PASSWORD_HASH_WORKERS": 0,
+        "ANALYTICS_ENABLED": False,
+    }
+
+
+def run_node(uri, block_size, mode, count, user_id, barrier, results):
+    """Build one app node and hand out ``count`` codes as fast as possible."""
+    app = create_app(node_config(uri, block_size))
+    codes = []
+    conflicts = 0
+    with app.app_context():
+        short_codes.allocate()  # Reserve the first block before timing.
+        barrier.wait()
+        start = time.perf_counter()
+        for i in range(count):
+            if mode == "allocate":
+                codes.append(short_codes.allocate())
+                continue
+            bookmark = Bookmark(url=f"https://node{os.getpid()}.example.com/{i}",
+                                body="", user_id=user_id)
+            db.session.add(bookmark)
+            try:
+                db.session.commit()
+            except IntegrityError:
+                db.session.rollback()
+                conflicts += 1
+                continue
+            codes.append(bookmark.short_url)
+        elapsed = time.perf_counter() - start
+    results.put({"codes": codes, "conflicts": conflicts, "elapsed": elapsed})
+
+
+def run(uri, workers, block_size, mode, count):
+    """Run ``workers`` nodes concurrently; return their combined figures."""
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(workers)
+    results = context.Queue()
+    app = create_app(node_config(uri, block_size))
+    with app.app_context():
+        user = User(username=f"bench{time.time_ns()}", email=f"{time.time_ns()}@example.com",
+                    password="x")
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+
+    processes = [
+        context.Process(target=run_node,
+                        args=(uri, block_size, mode, count, user_id, barrier, results))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    outcomes = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    codes = [code for outcome in outcomes for code in outcome["codes"]]
+    elapsed = max(outcome["elapsed"] for outcome in outcomes)
+    result = {
+        "workers": workers,
+        "codes": len(codes),
+        "duplicates": len(codes) - len(set(codes)),
+        "conflicts": sum(outcome["conflicts"] for outcome in outcomes),
+        "throughput_per_s": len(codes) / elapsed if elapsed else 0.0,
+    }
+    if mode == "insert":
+        with app.app_context():
+            stored = db.session.scalar(
+                select(func.count()).select_from(Bookmark).where(Bookmark.user_id == user_id)
+            )
+        result["missing_rows"] = len(codes) - stored
+    return result
+
+
+def main():
+    """Run each worker count, print JSON and fail on any collision."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--count", type=int, default=5000, help="codes per worker")
+    parser.add_argument("--block-size", type=int, default=100)
+    parser.add_argument("--mode", choices=("allocate", "insert"), default="allocate")
+    parser.add_argument("--uri", help="database URI (default: a temporary SQLite file)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        uri = args.uri or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        results = [run(uri, workers, args.block_size, args.mode, args.count)
+                   for workers in args.workers]
+
+    baseline = results[0]["throughput_per_s"] / results[0]["workers"]
+    for result in results:
+        result["scaling_efficiency"] = (
+            result["throughput_per_s"] / (baseline * result["workers"]) if baseline else 0.0
+        )
+    print(json.dumps({"mode": args.mode, "cpus": os.cpu_count(),
+                      "block_size": args.block_size, "results": results}, indent=2))
+
+    if any(result["duplicates"] or result["conflicts"] or result.get("missing_rows")
+           for result in results):
+        print("COLLISION: codes were handed out more than once", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Benchmark redirects through the Flask app and the standalone ASGI server.
+
+Seeds ``--rows`` bookmarks and times ``--requests`` redirects to random
+codes through the Flask test client (with visit buffering on, so both
+sides defer visit writes) and by calling ``src.redirect_server.app``
+directly. Neither path includes network I/O, so the numbers compare the
+per-request cost of each stack.
+
+    python -m benchmarks.bench_redirect_server --rows 10000 --requests 20000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import select
+
+from benchmarks.common import build_app, summarize
+from benchmarks.harness import seed
+from src.database import Bookmark, db
+from src.redirect_server import RedirectApp, config_from_env
+
+
+def bench_flask(app, codes, requests):
+    """Return a latency summary for redirects through the Flask app."""
+    client = app.test_client()
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(requests):
+        began = time.perf_counter()
+        client.get("/" + random.choice(codes))
+        latencies.append(time.perf_counter() - began)
+    return summarize(latencies, time.perf_counter() - start)
+
+
+async def bench_asgi(path, codes, requests):
+    """Return a latency summary for redirects through the ASGI app."""
+    application = RedirectApp(config_from_env({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}"}))
+    await application.startup()
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(_message):
+        pass
+
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(requests):
+        began = time.perf_counter()
+        await application({"type": "http", "method": "GET",
+                           "path": "/" + random.choice(codes), "headers": []},
+                          receive, send)
+        latencies.append(time.perf_counter() - began)
+    elapsed = time.perf_counter() - start
+    await application.shutdown()
+    return {**summarize(latencies, elapsed), "async_driver": application.async_driver}
+
+
+def main():
+    """Run both stacks and print JSON results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=1234)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        app = build_app(path, VISIT_BUFFERING=True, PASSWORD_HASH_WORKERS=0)
+        seed(app, args.rows, 1, "pbkdf2:sha256:1000")
+        with app.app_context():
+            codes = db.session.scalars(select(Bookmark.short_url)).all()
+
+        results = {
+            "flask": bench_flask(app, codes, args.requests),
+            "asgi": asyncio.run(bench_asgi(path, codes, args.requests)),
+        }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Micro-benchmark bookmark list serialization.
+
+Compares the hand-built dict literal previously used by the views, the
+shared serializer over ORM instances and over column rows, each encoded
+with Flask's default JSON provider and, when installed, with orjson.
+
+    python -m benchmarks.bench_serialization --sizes 100 1000
+"""
+import argparse
+import json
+import os
+import tempfile
+import timeit
+
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import insert, select
+
+from benchmarks.common import build_app
+from src.database import Bookmark, User, db
+from src.json_provider import OrjsonProvider, orjson
+from src.serializers import BOOKMARK_COLUMNS, serialize_bookmarks
+from src.shortcodes import short_codes
+
+
+def dict_literal(bookmarks):
+    """Serialize the way the views did before the shared serializer."""
+    return [{
+        'id': bookmark.id,
+        'url': bookmark.url,
+        'short_url': bookmark.short_url,
+        'visits': bookmark.visits,
+        'body': bookmark.body,
+        'created_at': bookmark.created_at,
+        'updated_at': bookmark.updated_at
+    } for bookmark in bookmarks]
+
+
+def main():
+    """Run the benchmark and print JSON results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = build_app(os.path.join(tmp, "serialize.db"))
+        with app.app_context():
+            user = User(username="bench", email="bench@example.com", password="x")
+            db.session.add(user)
+            db.session.commit()
+            count = max(args.sizes)
+            db.session.execute(insert(Bookmark), [
+                {"url": f"https://bench.example.com/{code}", "short_url": code,
+                 "body": "benchmark bookmark", "user_id": user.id, "visits": 7}
+                for code in short_codes.allocate_many(count)
+            ])
+            db.session.commit()
+
+            providers = {"default": DefaultJSONProvider(app)}
+            if orjson is not None:
+                providers["orjson"] = OrjsonProvider(app)
+
+            results = []
+            for size in args.sizes:
+                instances = db.session.scalars(select(Bookmark).limit(size)).all()
+                rows = db.session.execute(select(*BOOKMARK_COLUMNS).limit(size)).all()
+                cases = {
+                    "dict_literal/orm": (dict_literal, instances),
+                    "serializer/orm": (serialize_bookmarks, instances),
+                    "serializer/rows": (serialize_bookmarks, rows),
+                }
+                for case, (serialize, items) in cases.items():
+                    for name, provider in providers.items():
+                        seconds = min(timeit.repeat(
+                            lambda s=serialize, i=items, p=provider: p.dumps({"data": s(i)}),
+                            number=args.repeat // 10 or 1, repeat=10,
+                        )) / (args.repeat // 10 or 1)
+                        results.append({"items": size, "case": case,
+                                        "json": name, "ms": seconds * 1000})
+
+    print(json.dumps({"benchmark": "serialization", "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Benchmark short code allocation as the bookmark table grows.
+
+Seeds a temporary SQLite database up to ``--rows`` bookmarks and, at each
+checkpoint, times ``--samples`` single-bookmark inserts through the ORM
+path used by ``POST /api/v1/bookmarks/``. Insert cost and statements per
+insert should stay flat from an empty table to millions of rows.
+
+    python -m benchmarks.bench_short_codes --rows 1000000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from sqlalchemy import event, insert
+
+from benchmarks.common import build_app
+from src.database import Bookmark, User, db
+from src.shortcodes import short_codes
+
+SEED_BATCH = 10000
+
+
+def seed(user_id, count):
+    """Bulk insert ``count`` bookmarks for ``user_id``."""
+    while count > 0:
+        batch = min(count, SEED_BATCH)
+        codes = short_codes.allocate_many(batch)
+        db.session.execute(insert(Bookmark), [
+            {"url": f"https://seed.example.com/{code}", "short_url": code,
+             "user_id": user_id, "visits": 0}
+            for code in codes
+        ])
+        db.session.commit()
+        count -= batch
+
+
+def measure(user_id, samples, statements):
+    """Time ``samples`` single ORM inserts; return per-insert figures."""
+    statements.clear()
+    start = time.perf_counter()
+    for i in range(samples):
+        db.session.add(Bookmark(url=f"https://bench.example.com/{time.time_ns()}/{i}",
+                                body="", user_id=user_id))
+        db.session.commit()
+    elapsed = time.perf_counter() - start
+    return {
+        "insert_us": elapsed / samples * 1e6,
+        "statements_per_insert": len(statements) / samples,
+    }
+
+
+def main():
+    """Run the benchmark and print JSON results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--samples", type=int, default=500)
+    args = parser.parse_args()
+
+    checkpoints = [0] + [n for n in (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+                         if n <= args.rows]
+    with tempfile.TemporaryDirectory() as tmp:
+        app = build_app(os.path.join(tmp, "bench.db"))
+        with app.app_context():
+            statements = []
+            event.listen(db.engine, "before_cursor_execute",
+                         lambda *_: statements.append(1))
+            user = User(username="bench", email="bench@example.com", password="x")
+            db.session.add(user)
+            db.session.commit()
+
+            results = []
+            rows = 0
+            for checkpoint in checkpoints:
+                seed(user.id, checkpoint - rows)
+                rows = checkpoint
+                result = {"rows": rows, **measure(user.id, args.samples, statements)}
+                rows += args.samples
+                results.append(result)
+                print(json.dumps(result))
+
+    print(json.dumps({"benchmark": "short_codes", "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
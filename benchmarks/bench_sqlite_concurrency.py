@@ -0,0 +1,97 @@
+"""Benchmark redirect throughput on SQLite while a writer is running.
+
+Runs reader threads issuing redirects (with the redirect cache disabled so
+every request reads the database) while one writer thread keeps creating
+bookmarks, once with the legacy rollback journal and once with the tuned
+WAL settings from ``src.db_config``.
+
+    python -m benchmarks.bench_sqlite_concurrency --seconds 5 --readers 8
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+
+from sqlalchemy import select
+
+from benchmarks.common import build_app, summarize
+from benchmarks.harness import seed
+from src.database import Bookmark, User, db
+
+PROFILES = {
+    "rollback_journal": {"SQLITE_JOURNAL_MODE": "DELETE", "SQLITE_SYNCHRONOUS": "FULL",
+                         "SQLITE_MMAP_SIZE": 0, "SQLITE_CACHE_SIZE": -2000},
+    "wal_tuned": {},
+}
+
+
+def run(name, overrides, args, tmp):
+    """Return redirect figures for one pragma profile."""
+    app = build_app(os.path.join(tmp, f"{name}.db"), REDIRECT_CACHE_SIZE=0,
+                    PASSWORD_HASH_WORKERS=0, **overrides)
+    seed(app, args.rows, 1, "pbkdf2:sha256:1000")
+    with app.app_context():
+        codes = db.session.scalars(select(Bookmark.short_url).limit(1000)).all()
+        user_id = db.session.scalar(select(User.id))
+
+    stop = threading.Event()
+    latencies = []
+    errors = []
+    writes = [0]
+    lock = threading.Lock()
+
+    def writer():
+        with app.app_context():
+            while not stop.is_set():
+                db.session.add(Bookmark(url=f"https://write.example.com/{time.time_ns()}",
+                                        user_id=user_id))
+                db.session.commit()
+                writes[0] += 1
+
+    def reader():
+        client = app.test_client()
+        local = []
+        failed = 0
+        while not stop.is_set():
+            start = time.perf_counter()
+            response = client.get("/" + random.choice(codes))
+            local.append(time.perf_counter() - start)
+            failed += response.status_code != 302
+        with lock:
+            latencies.extend(local)
+            errors.append(failed)
+
+    threads = [threading.Thread(target=writer)]
+    threads += [threading.Thread(target=reader) for _ in range(args.readers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    return {"profile": name, "writes": writes[0], "errors": sum(errors),
+            **summarize(latencies, elapsed)}
+
+
+def main():
+    """Run the benchmark and print JSON results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = [run(name, overrides, args, tmp) for name, overrides in PROFILES.items()]
+    print(json.dumps({"benchmark": "sqlite_concurrency", "readers": args.readers,
+                      "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
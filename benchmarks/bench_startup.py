@@ -0,0 +1,122 @@
+"""Measure cold start time and worker memory per startup profile.
+
+Every run is a fresh interpreter configured from the environment, as a
+production worker is, with ``STARTUP_PROFILE`` set to ``default`` or
+``fast``. It reports the time to import ``src`` and to run
+``create_app``, the first and second ``/packages`` request and the RSS
+after start-up. It then forks ``--workers`` children from the started app,
+as a pre-forking server does; each serves one request and reports its
+private (unshared) memory from ``/proc/self/smaps_rollup``.
+
+    python -m benchmarks.bench_startup --runs 5 --workers 4
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def memory_kb(field, path="/proc/self/status"):
+    """Return the kB value of ``field`` summed over ``path``, or 0."""
+    total = 0
+    try:
+        with open(path, encoding="ascii") as lines:
+            for line in lines:
+                name, _, value = line.partition(":")
+                if name in field:
+                    total += int(value.split()[0])
+    except OSError:
+        return 0
+    return total
+
+
+def child():
+    """Start the app in this fresh interpreter and print its figures as JSON."""
+    began = time.perf_counter()
+    from src import create_app  # pylint: disable=import-outside-toplevel
+    imported = time.perf_counter()
+    app = create_app()
+    created = time.perf_counter()
+    client = app.test_client()
+    timings = []
+    for _ in range(2):
+        start = time.perf_counter()
+        client.get("/packages")
+        timings.append(time.perf_counter() - start)
+    result = {
+        "import_ms": (imported - began) * 1000,
+        "create_app_ms": (created - imported) * 1000,
+        "first_packages_ms": timings[0] * 1000,
+        "second_packages_ms": timings[1] * 1000,
+        "rss_mb": memory_kb(("VmRSS",)) / 1024,
+    }
+
+    workers = int(os.environ.get("BENCH_WORKERS", 0))
+    readers = []
+    for _ in range(workers):
+        read_fd, write_fd = os.pipe()
+        if os.fork() == 0:
+            os.close(read_fd)
+            app.test_client().get("/hello")
+            private = memory_kb(("Private_Clean", "Private_Dirty"), "/proc/self/smaps_rollup")
+            os.write(write_fd, str(private).encode())
+            os._exit(0)  # pylint: disable=protected-access
+        os.close(write_fd)
+        readers.append(read_fd)
+    private = []
+    for read_fd in readers:
+        private.append(int(os.read(read_fd, 64) or 0) / 1024)
+        os.close(read_fd)
+        os.wait()
+    if private:
+        result["worker_private_mb"] = statistics.mean(private)
+    print(json.dumps(result))
+
+
+def run(profile, env, runs, workers):
+    """Return the median of each figure over ``runs`` fresh interpreters."""
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_startup", "--child"],
+            env={**env, "STARTUP_PROFILE": profile, "BENCH_WORKERS": str(workers)},
+            check=True, capture_output=True, text=True,
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return {key: statistics.median(sample[key] for sample in samples) for key in samples[0]}
+
+
+def main():
+    """Run each profile and print JSON results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child()
+        return
+
+    # Imported only here: importing src in the children is what is timed.
+    from benchmarks.common import BENCH_JWT_SECRET  # pylint: disable=import-outside-toplevel
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            "SECRET_KEY": "bench",
+            "JWT_SECRET_KEY": BENCH_JWT_SECRET,
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            "PASSWORD_HASH_WORKERS": "0",
+        }
+        # The default profile creates the schema the fast profile expects.
+        results = {profile: run(profile, env, args.runs, args.workers)
+                   for profile in ("default", "fast")}
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
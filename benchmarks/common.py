@@ -0,0 +1,34 @@
+"""Helpers shared by the benchmark scripts."""
+import statistics
+
+from src import create_app
+
+BENCH_JWT_SECRET = "bench-secret-key-for-benchmarks-only"
+
+
+def build_app(path, **config):
+    """Create the app against a SQLite database at ``path``."""
+    return create_app({
+        "SECRET_KEY": "bench",
+        "JWT_SECRET_KEY": BENCH_JWT_SECRET,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}",
+        "SQLALCHEMY_TRACK_MODIFICATIONS": False,
+        **config,
+    })
+
+
+def percentile(samples, pct):
+    """Return the ``pct`` percentile of ``samples`` (0-100)."""
+    if len(samples) < 2:
+        return samples[0] if samples else 0.0
+    return statistics.quantiles(samples, n=100, method="inclusive")[max(pct, 1) - 1]
+
+
+def summarize(latencies, elapsed):
+    """Return throughput and latency percentiles in milliseconds."""
+    return {
+        "requests": len(latencies),
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
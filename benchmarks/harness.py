@@ -0,0 +1,295 @@
+"""Reproducible benchmark suite for the API hot paths.
+
+Builds the app with ``create_app(test_config=...)`` against a SQLite
+database seeded with ``--rows`` bookmarks owned by one heavy user, then
+measures throughput and p50/p99 latency for redirect, create, list (first
+and deep pages, page and cursor mode), search (a rare term, and a term in
+every bookmark for its owner and for a user with none), stats, login and
+``/me`` from ``--concurrency`` threads. Results are written as JSON;
+passing ``--baseline`` compares against an earlier run and exits non-zero
+when a scenario regresses by more than ``--tolerance``.
+
+    python -m benchmarks.harness --rows 100000 --output bench.json
+    python -m benchmarks.harness --rows 100000 --baseline bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy import func, insert, select
+from werkzeug.security import generate_password_hash
+
+from benchmarks.common import build_app, summarize
+from src.bookmarks import encode_cursor
+from src.commands import reconcile_user_counters
+from src.database import Bookmark, User, db
+from src.serializers import BOOKMARK_COLUMNS
+from src.shortcodes import short_codes
+from src.urls import url_digest
+
+SEED_BATCH = 10000
+PASSWORD = "benchmark-password"
+PER_PAGE = 20
+
+
+def seed(app, rows, users, hash_method):
+    """Create ``users`` accounts and ``rows`` bookmarks for the first one."""
+    with app.app_context():
+        pwhash = generate_password_hash(PASSWORD, method=hash_method)
+        db.session.execute(insert(User), [
+            {"username": f"bench{i}", "email": f"bench{i}@example.com",
+             "password": pwhash}
+            for i in range(users)
+        ])
+        db.session.commit()
+        heavy_id = db.session.scalar(select(User.id).where(User.username == "bench0"))
+
+        remaining = rows
+        while remaining > 0:
+            batch = min(remaining, SEED_BATCH)
+            codes = short_codes.allocate_many(batch)
+            db.session.execute(insert(Bookmark), [
+                {"url": f"https://seed.example.com/{code}",
+                 "url_hash": url_digest(f"https://seed.example.com/{code}"),
+                 "short_url": code, "body": "seeded bookmark",
+                 "user_id": heavy_id, "visits": 0}
+                for code in codes
+            ])
+            db.session.commit()
+            remaining -= batch
+        reconcile_user_counters(db.engine)
+
+
+def prepare(app, rows):
+    """Return tokens, codes and cursors the scenarios need."""
+    client = app.test_client()
+    tokens = []
+    for username in ("bench0", "bench1"):
+        response = client.post("/api/v1/auth/login", json={
+            "email": f"{username}@example.com", "password": PASSWORD,
+        })
+        user = response.get_json().get("user") if response.status_code == 200 else None
+        tokens.append(user["access"] if user else None)
+
+    with app.app_context():
+        user_id = db.session.scalar(select(User.id).where(User.username == "bench0"))
+        codes = db.session.scalars(
+            select(Bookmark.short_url).order_by(func.random()).limit(1000)
+        ).all()
+        deep_row = db.session.execute(
+            select(*BOOKMARK_COLUMNS)
+            .where(Bookmark.user_id == user_id)
+            .order_by(Bookmark.created_at, Bookmark.id)
+            .offset(max(rows - PER_PAGE - 1, 0))
+            .limit(1)
+        ).first()
+
+    return {
+        "headers": {"Authorization": f"Bearer {tokens[0]}"},
+        # A second account owning no bookmarks, when the run has one.
+        "light_headers": {"Authorization": f"Bearer {tokens[1] or tokens[0]}"},
+        "codes": codes,
+        "deep_page": max(rows // PER_PAGE, 1),
+        "deep_cursor": encode_cursor(deep_row) if deep_row else "",
+    }
+
+
+def scenarios(ctx, users):
+    """Return scenario name -> (request function, expected statuses)."""
+    headers = ctx["headers"]
+    counter = iter(range(10 ** 12))
+    lock = threading.Lock()
+
+    def unique():
+        with lock:
+            return next(counter)
+
+    return {
+        "redirect": (
+            lambda c: c.get("/" + random.choice(ctx["codes"])), {302}),
+        "create": (
+            lambda c: c.post("/api/v1/bookmarks/", headers=headers, json={
+                "url": f"https://bench.example.com/{time.time_ns()}/{unique()}",
+                "body": "benchmark",
+            }), {201}),
+        "list_first_page": (
+            lambda c: c.get(f"/api/v1/bookmarks/?page=1&per_page={PER_PAGE}",
+                            headers=headers), {200}),
+        "list_deep_page": (
+            lambda c: c.get(f"/api/v1/bookmarks/?page={ctx['deep_page']}"
+                            f"&per_page={PER_PAGE}", headers=headers), {200}),
+        "list_cursor_first": (
+            lambda c: c.get(f"/api/v1/bookmarks/?cursor=&per_page={PER_PAGE}",
+                            headers=headers), {200}),
+        "list_cursor_deep": (
+            lambda c: c.get(f"/api/v1/bookmarks/?cursor={ctx['deep_cursor']}"
+                            f"&per_page={PER_PAGE}", headers=headers), {200}),
+        "search": (
+            lambda c: c.get(f"/api/v1/bookmarks/search?q={random.choice(ctx['codes'])}",
+                            headers=headers), {200}),
+        # Every seeded bookmark's body contains "seeded": the match set is
+        # the whole table, for its owner and for a user with no bookmarks.
+        "search_common": (
+            lambda c: c.get("/api/v1/bookmarks/search?q=seeded", headers=headers), {200}),
+        "search_common_light": (
+            lambda c: c.get("/api/v1/bookmarks/search?q=seeded",
+                            headers=ctx["light_headers"]), {200}),
+        "stats": (
+            lambda c: c.get(f"/api/v1/bookmarks/stats?top=10&per_page={PER_PAGE}",
+                            headers=headers), {200}),
+        "login": (
+            lambda c: c.post("/api/v1/auth/login", json={
+                "email": f"bench{random.randrange(users)}@example.com",
+                "password": PASSWORD,
+            }), {200}),
+        "me": (
+            lambda c: c.get("/api/v1/auth/me", headers=headers), {200}),
+    }
+
+
+def measure(app, request_fn, expected, requests, concurrency):
+    """Run ``requests`` calls of ``request_fn`` from ``concurrency`` threads."""
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    per_thread = max(requests // concurrency, 1)
+
+    def worker():
+        client = app.test_client()
+        local = []
+        failed = 0
+        for _ in range(per_thread):
+            start = time.perf_counter()
+            response = request_fn(client)
+            local.append(time.perf_counter() - start)
+            if response.status_code not in expected:
+                failed += 1
+        with lock:
+            latencies.extend(local)
+            errors.append(failed)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return {"errors": sum(errors), **summarize(latencies, elapsed)}
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of regressions of ``results`` against ``baseline``."""
+    regressions = []
+    for name, current in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if previous is None:
+            continue
+        if current["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: throughput {current['throughput_rps']:.1f} rps < "
+                f"baseline {previous['throughput_rps']:.1f} rps"
+            )
+        if current["p99_ms"] > previous["p99_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: p99 {current['p99_ms']:.2f} ms > "
+                f"baseline {previous['p99_ms']:.2f} ms"
+            )
+    return regressions
+
+
+def parse_config(pairs):
+    """Turn KEY=VALUE pairs into an app config mapping (values as JSON)."""
+    config = {}
+    for pair in pairs:
+        key, _, value = pair.partition("=")
+        try:
+            config[key] = json.loads(value)
+        except ValueError:
+            config[key] = value
+    return config
+
+
+def main():
+    """Run the suite, write JSON results and check for regressions."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--login-requests", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--hash-method", default="pbkdf2:sha256:100000",
+                        help="password hash method for seeded users and the app")
+    parser.add_argument("--scenario", action="append",
+                        help="run only the named scenario(s)")
+    parser.add_argument("--config", action="append", default=[],
+                        help="extra app config as KEY=VALUE (JSON values)")
+    parser.add_argument("--db", help="reuse (or create and seed) this SQLite file")
+    parser.add_argument("--output", help="write JSON results to this file")
+    parser.add_argument("--baseline", help="compare against this JSON results file")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=1234)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    config = {"PASSWORD_HASH_METHOD": args.hash_method, **parse_config(args.config)}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.db or os.path.join(tmp, "bench.db")
+        needs_seed = not os.path.exists(path)
+        app = build_app(path, **config)
+        if needs_seed:
+            started = time.perf_counter()
+            seed(app, args.rows, args.users, args.hash_method)
+            print(f"seeded {args.rows} bookmarks in {time.perf_counter() - started:.1f}s",
+                  file=sys.stderr)
+        with app.app_context():
+            rows = db.session.scalar(select(func.count()).select_from(Bookmark))
+
+        ctx = prepare(app, rows)
+        results = {
+            "meta": {
+                "rows": rows,
+                "concurrency": args.concurrency,
+                "requests": args.requests,
+                "config": config,
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            },
+            "scenarios": {},
+        }
+        for name, (request_fn, expected) in scenarios(ctx, args.users).items():
+            if args.scenario and name not in args.scenario:
+                continue
+            requests = args.login_requests if name == "login" else args.requests
+            result = measure(app, request_fn, expected, requests, args.concurrency)
+            results["scenarios"][name] = result
+            print(f"{name:>18}: {result['throughput_rps']:9.1f} rps  "
+                  f"p50 {result['p50_ms']:8.2f} ms  p99 {result['p99_ms']:8.2f} ms  "
+                  f"errors {result['errors']}", file=sys.stderr)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(output + "\n")
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            regressions = compare(results, json.load(handle), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
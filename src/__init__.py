@@ -1,16 +1,36 @@
 """Flask application factory and configuration."""
+import functools
 import os
 import importlib.metadata
-from flask import Flask, redirect, jsonify  # pylint: disable=no-name-in-module
+from flask import Flask, abort, redirect, jsonify  # pylint: disable=no-name-in-module
 from flask_jwt_extended import JWTManager  # pylint: disable=no-name-in-module
+from sqlalchemy import select
+from src.analytics import visit_analytics
 from src.auth import auth
+from src.bloom import bookmark_filter
 from src.bookmarks import bookmarks
+from src.cache import redirect_cache
+from src.commands import register_commands
+from src.compress import response_compressor
 from src.database import db, Bookmark
+from src.db_config import configure_engine_options, install_sqlite_pragmas
+from src.hashing import password_hasher
+from src.json_provider import init_json_provider
+from src.metrics import request_metrics
+from src.replicas import read_router
+from src.search import install_search_index
+from src.shortcodes import short_codes
+from src.visits import visit_counter
 from src.constants.http_status_codes import (HTTP_404_NOT_FOUND, HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@functools.cache
 def list_installed_packages():
-    """Return sorted list of installed Python packages with versions."""
+    """Return sorted list of installed Python packages with versions.
+
+    Reading every distribution's metadata takes tens of milliseconds and
+    the result cannot change while the process runs, so it is read once.
+    """
     installed_packages = importlib.metadata.distributions()
     return sorted([f"{i.metadata['Name']}=={i.version}" for i in installed_packages])
 
@@ -20,26 +40,111 @@ def create_app(test_config=None):
     app = Flask(__name__, instance_relative_config=True, static_folder='static')
 
     if test_config is None:
+        # STARTUP_PROFILE=fast is meant for production workers: the schema
+        # is managed with ``flask upgrade-db`` instead of on every start.
+        fast_startup = os.environ.get("STARTUP_PROFILE", "default") == "fast"
+        redirect_cache_size = int(os.environ.get("REDIRECT_CACHE_SIZE", 10000))
         app.config.from_mapping(
             SECRET_KEY=os.environ.get("SECRET_KEY"),
             SQLALCHEMY_DATABASE_URI=os.environ.get("SQLALCHEMY_DATABASE_URI"),
             SQLALCHEMY_TRACK_MODIFICATIONS=False,
+            DB_CREATE_ALL=os.environ.get("DB_CREATE_ALL", "0" if fast_startup else "1") == "1",
             JWT_SECRET_KEY=os.environ.get("JWT_SECRET_KEY"),
+            SQLITE_JOURNAL_MODE=os.environ.get("SQLITE_JOURNAL_MODE", "WAL"),
+            SQLITE_SYNCHRONOUS=os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL"),
+            SQLITE_BUSY_TIMEOUT=int(os.environ.get("SQLITE_BUSY_TIMEOUT", 5000)),
+            SQLITE_MMAP_SIZE=int(os.environ.get("SQLITE_MMAP_SIZE", 256 * 1024 * 1024)),
+            SQLITE_CACHE_SIZE=int(os.environ.get("SQLITE_CACHE_SIZE", -64 * 1024)),
+            READ_REPLICA_URI=os.environ.get("READ_REPLICA_URI"),
+            READ_YOUR_WRITES_SECONDS=float(os.environ.get("READ_YOUR_WRITES_SECONDS", 5)),
+            DB_POOL_SIZE=int(os.environ.get("DB_POOL_SIZE", 10)),
+            DB_MAX_OVERFLOW=int(os.environ.get("DB_MAX_OVERFLOW", 20)),
+            DB_POOL_PRE_PING=os.environ.get("DB_POOL_PRE_PING", "1") == "1",
+            DB_POOL_RECYCLE=int(os.environ.get("DB_POOL_RECYCLE", 1800)),
+            JSON_PROVIDER=os.environ.get("JSON_PROVIDER", "auto"),
+            PASSWORD_HASH_METHOD=os.environ.get("PASSWORD_HASH_METHOD", "pbkdf2:sha256"),
+            PASSWORD_HASH_WORKERS=int(os.environ.get("PASSWORD_HASH_WORKERS", 2)),
+            PASSWORD_HASH_QUEUE_DEPTH=int(os.environ.get("PASSWORD_HASH_QUEUE_DEPTH", 64)),
+            REDIRECT_CACHE_SIZE=redirect_cache_size,
+            REDIRECT_CACHE_TTL=float(os.environ.get("REDIRECT_CACHE_TTL", 300)),
+            BULK_IMPORT_MAX_ITEMS=int(os.environ.get("BULK_IMPORT_MAX_ITEMS", 10000)),
+            BATCH_MAX_ITEMS=int(os.environ.get("BATCH_MAX_ITEMS", 10000)),
+            SEARCH_MAX_CANDIDATES=int(os.environ.get("SEARCH_MAX_CANDIDATES", 1000)),
+            COMPRESS_ENABLED=os.environ.get("COMPRESS_ENABLED", "1") == "1",
+            COMPRESS_ALGORITHMS=os.environ.get("COMPRESS_ALGORITHMS", "zstd,br,gzip"),
+            COMPRESS_MIN_SIZE=int(os.environ.get("COMPRESS_MIN_SIZE", 1024)),
+            COMPRESS_GZIP_LEVEL=int(os.environ.get("COMPRESS_GZIP_LEVEL", 6)),
+            COMPRESS_BROTLI_LEVEL=int(os.environ.get("COMPRESS_BROTLI_LEVEL", 4)),
+            COMPRESS_ZSTD_LEVEL=int(os.environ.get("COMPRESS_ZSTD_LEVEL", 3)),
+            COMPRESS_CACHE_MAX_BYTES=int(
+                os.environ.get("COMPRESS_CACHE_MAX_BYTES", 32 * 1024 * 1024)
+            ),
+            SLOW_REQUEST_THRESHOLD=os.environ.get("SLOW_REQUEST_THRESHOLD"),
+            SHORT_CODE_BLOCK_SIZE=int(os.environ.get("SHORT_CODE_BLOCK_SIZE", 100)),
+            SHORT_CODE_BLOCK_MAX_AGE=float(os.environ.get("SHORT_CODE_BLOCK_MAX_AGE", 300)),
+            BLOOM_FILTER_ENABLED=os.environ.get("BLOOM_FILTER_ENABLED", "1") == "1",
+            BLOOM_FILTER_FALSE_POSITIVE_RATE=float(
+                os.environ.get("BLOOM_FILTER_FALSE_POSITIVE_RATE", 0.01)
+            ),
+            BLOOM_FILTER_MAX_BYTES=int(os.environ.get("BLOOM_FILTER_MAX_BYTES", 16 * 1024 * 1024)),
+            BLOOM_FILTER_REBUILD_INTERVAL=float(
+                os.environ.get("BLOOM_FILTER_REBUILD_INTERVAL", 600)
+            ),
+            BLOOM_FILTER_WATERMARK_REFRESH=float(
+                os.environ.get("BLOOM_FILTER_WATERMARK_REFRESH", 1)
+            ),
+            BLOOM_FILTER_WATERMARK_SLACK=int(
+                os.environ.get("BLOOM_FILTER_WATERMARK_SLACK", 20000)
+            ),
+            # Buffered by default with the redirect cache on, so a cache hit
+            # touches neither SQLAlchemy nor the database.
+            VISIT_BUFFERING=os.environ.get(
+                "VISIT_BUFFERING", "1" if redirect_cache_size > 0 else "0"
+            ) == "1",
+            VISIT_FLUSH_INTERVAL=float(os.environ.get("VISIT_FLUSH_INTERVAL", 5)),
+            VISIT_FLUSH_THRESHOLD=int(os.environ.get("VISIT_FLUSH_THRESHOLD", 1000)),
+            ANALYTICS_ENABLED=os.environ.get("ANALYTICS_ENABLED", "1") == "1",
+            ANALYTICS_FLUSH_INTERVAL=float(os.environ.get("ANALYTICS_FLUSH_INTERVAL", 60)),
+            ANALYTICS_HOURLY_RETENTION_DAYS=int(
+                os.environ.get("ANALYTICS_HOURLY_RETENTION_DAYS", 14)
+            ),
+            ANALYTICS_DAILY_RETENTION_DAYS=int(
+                os.environ.get("ANALYTICS_DAILY_RETENTION_DAYS", 730)
+            ),
         )
     else:
         app.config.from_mapping(test_config)
+    app.config.setdefault("DB_CREATE_ALL", True)
 
+    configure_engine_options(app)
+    read_router.init_app(app)
     db.app = app
     db.init_app(app)
+    with app.app_context():
+        for engine in db.engines.values():
+            install_sqlite_pragmas(app.config, engine)
 
     JWTManager(app)
-
-    # Add this block to create the database tables
-    with app.app_context():
-        db.create_all()
+    init_json_provider(app)
+    password_hasher.init_app(app)
+    redirect_cache.init_app(app)
+    short_codes.init_app(app)
+    bookmark_filter.init_app(app)
+    visit_counter.init_app(app)
+    visit_analytics.init_app(app)
+    request_metrics.init_app(app)
+    # Registered after the metrics hook so its time counts in the latency.
+    response_compressor.init_app(app)
+
+    # Without DB_CREATE_ALL start-up does not touch the database at all.
+    if app.config["DB_CREATE_ALL"]:
+        with app.app_context():
+            db.create_all()
+            install_search_index(db.engine)
 
     app.register_blueprint(auth)
     app.register_blueprint(bookmarks)
+    register_commands(app)
 
     @app.get("/")
     def index():
@@ -81,6 +186,17 @@ def create_app(test_config=None):
         packages = list_installed_packages()
         return {"packages": packages}
 
+    @app.get("/cache/stats")
+    def cache_stats():
+        """Return redirect cache and visit buffer counters."""
+        return {
+            "redirect_cache": redirect_cache.stats(),
+            "visit_counter": visit_counter.stats(),
+            "visit_analytics": visit_analytics.stats(),
+            "bookmark_filter": bookmark_filter.stats(),
+            "response_compressor": response_compressor.stats(),
+        }
+
     @app.route('/favicon.ico')
     def favicon():
         """Serve the favicon."""
@@ -94,14 +210,30 @@ def create_app(test_config=None):
     @app.get('/<short_url>')
     def redirect_to_url(short_url):
         """Redirect to the original URL based on the short URL code."""
-        bookmark = Bookmark.query.filter_by(short_url=short_url).first_or_404()
-
-        if bookmark:
-            bookmark.visits += 1
-            db.session.commit()
-            return redirect(bookmark.url)
-        else:
-            return jsonify({"error": "Short URL not found."}), HTTP_404_NOT_FOUND
+        entry = redirect_cache.get(short_url)
+
+        if entry is None:
+            if not bookmark_filter.might_have_code(short_url):
+                abort(HTTP_404_NOT_FOUND)
+            query = select(Bookmark.id, Bookmark.user_id, Bookmark.url).where(
+                Bookmark.short_url == short_url
+            )
+            row = db.session.execute(
+                query, bind_arguments=read_router.bind_arguments()
+            ).first()
+            if row is None and read_router.enabled:
+                # The replica may not have caught up with a new bookmark yet.
+                row = db.session.execute(query).first()
+            if row is None:
+                bookmark_filter.note_miss(short_url=short_url)
+                abort(HTTP_404_NOT_FOUND)
+            entry = tuple(row)
+            redirect_cache.set(short_url, entry)
+
+        bookmark_id, user_id, url = entry
+        visit_counter.record(short_url, user_id)
+        visit_analytics.record(bookmark_id)
+        return redirect(url)
 
     @app.errorhandler(HTTP_404_NOT_FOUND)
     def handle_404(e):
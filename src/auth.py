@@ -1,6 +1,7 @@
 """Authentication routes and user management."""
-import validators
 # type: ignore
+import logging
+
 from flask import Blueprint, jsonify, request  # type: ignore
 from flask_jwt_extended import (
     jwt_required,
@@ -8,10 +9,8 @@ from flask_jwt_extended import (
     create_refresh_token,
     get_jwt_identity,
 )
-from werkzeug.security import (
-    check_password_hash,
-    generate_password_hash,  # type: ignore
-)
+from sqlalchemy import select
+from sqlalchemy.exc import DBAPIError
 
 from src.constants.http_status_codes import (
     HTTP_200_OK,
@@ -19,12 +18,25 @@ from src.constants.http_status_codes import (
     HTTP_400_BAD_REQUEST,
     HTTP_401_UNAUTHORIZED,
     HTTP_409_CONFLICT,
+    HTTP_503_SERVICE_UNAVAILABLE,
 )
 from src.database import User, db
+from src.hashing import HashingBusy, password_hasher
+from src.replicas import read_router
+
+logger = logging.getLogger(__name__)
 
 auth = Blueprint("auth", __name__, url_prefix="/api/v1/auth")
 
 
+@auth.errorhandler(HashingBusy)
+def handle_hashing_busy(_error):
+    """Ask clients to back off while the password hashing queue is full."""
+    return jsonify(
+        {"error": "Server is busy, please try again shortly."}
+    ), HTTP_503_SERVICE_UNAVAILABLE, {"Retry-After": "1"}
+
+
 @auth.post("/register")
 def register():
     """Register a new user with username, email, and password."""
@@ -48,6 +60,7 @@ def register():
             {"error": "User Name should be alpha-numeric and without spaces."}
         ), HTTP_400_BAD_REQUEST
 
+    import validators  # pylint: disable=import-outside-toplevel
     if not validators.email(email):
         return jsonify(
             {"error": "Email is not a valid email address."}
@@ -59,7 +72,7 @@ def register():
     if User.query.filter_by(username=username).first() is not None:
         return jsonify({"error": "User Name is already in use."}), HTTP_409_CONFLICT
 
-    pwd_hash = generate_password_hash(password, method='pbkdf2:sha256')
+    pwd_hash = password_hasher.hash(password)
 
     user = User(username=username, password=pwd_hash, email=email)
     db.session.add(user)
@@ -82,9 +95,20 @@ def login():
     user = User.query.filter_by(email=email).first()
 
     if user:
-        is_pass_correct = check_password_hash(user.password, password)
+        is_pass_correct = password_hasher.verify(user.password, password)
 
         if is_pass_correct:
+            if password_hasher.needs_rehash(user.password):
+                user.password = password_hasher.hash(password)
+                try:
+                    db.session.commit()
+                except DBAPIError:
+                    # A password column that 'flask upgrade-db' has not yet
+                    # widened cannot hold the new hash; keep the old one.
+                    db.session.rollback()
+                    logger.warning("Could not store a rehashed password for user %s; "
+                                   "run 'flask upgrade-db'.", user.id, exc_info=True)
+
             refresh = create_refresh_token(identity=str(user.id))
             access = create_access_token(identity=str(user.id))
 
@@ -108,7 +132,12 @@ def login():
 def me():
     """Get current authenticated user information."""
     user_id = get_jwt_identity()
-    user = User.query.filter_by(id=user_id).first()
+    query = select(User.username, User.email).where(User.id == user_id)
+    user = db.session.execute(
+        query, bind_arguments=read_router.bind_arguments(user_id)
+    ).first()
+    if user is None and read_router.enabled:
+        user = db.session.execute(query).first()
     return jsonify({
         "username": user.username,
         "email": user.email
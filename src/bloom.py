@@ -0,0 +1,319 @@
+"""Bloom filters answering definite misses without a database query.
+
+``bookmark_filter`` keeps one filter over every short code and one over
+every normalized URL digest. A redirect to a code that is definitely not
+in the table is answered with a 404, and a new bookmark whose URL is
+definitely unused skips the duplicate pre-check, without touching the
+database. Writes made by this process are added immediately and a
+background thread rebuilds both filters every
+``BLOOM_FILTER_REBUILD_INTERVAL`` seconds, sized for
+``BLOOM_FILTER_FALSE_POSITIVE_RATE`` within ``BLOOM_FILTER_MAX_BYTES``.
+
+A URL missing from the filter is only a hint: the unique index on
+``url_hash`` still rejects a duplicate inserted by another process. A
+short code missing from the filter must really be missing, and other
+processes and nodes insert codes this process never sees. Codes come
+from one increasing sequence and allocator blocks are abandoned after
+``SHORT_CODE_BLOCK_MAX_AGE`` seconds, so any code below the sequence
+value of a bookmark created more than twice that age before a build was
+either in the table at the build or will never be handed out. Codes from
+that floor up to the current sequence value (refreshed every
+``BLOOM_FILTER_WATERMARK_REFRESH`` seconds) plus
+``BLOOM_FILTER_WATERMARK_SLACK`` may be new and always go to the
+database; codes beyond that have not been allocated yet. The slack must
+cover what every node together reserves within one refresh; a bulk
+import reserves up to ``BULK_IMPORT_MAX_ITEMS`` codes at once.
+"""
+import hashlib
+import logging
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+
+from src.database import Bookmark, db
+from src.shortcodes import code_to_sequence, current_sequence
+from src.workers import BackgroundWorker
+
+logger = logging.getLogger(__name__)
+
+# Room for growth between rebuilds; a filter past capacity rebuilds early.
+GROWTH = 1.5
+MIN_CAPACITY = 10000
+BUILD_BATCH = 10000
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings."""
+
+    def __init__(self, capacity, error_rate, max_bytes=None):
+        capacity = max(int(capacity), 1)
+        bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        if max_bytes:
+            bits = min(bits, int(max_bytes) * 8)
+        self.size = max(bits, 64)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.capacity = capacity
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        value = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=16).digest(), "little")
+        first, step, size = value >> 64, value & 0xFFFFFFFFFFFFFFFF | 1, self.size
+        return [(first + i * step) % size for i in range(self.hashes)]
+
+    def add(self, key):
+        """Add ``key`` to the filter."""
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7))
+                   for position in self._positions(key))
+
+    @property
+    def nbytes(self):
+        """Return the memory used by the bit array."""
+        return len(self._bits)
+
+    def error_rate(self):
+        """Return the expected false-positive rate at the current fill."""
+        return (1 - math.exp(-self.hashes * self.count / self.size)) ** self.hashes
+
+
+class BookmarkFilter:
+    """Short code and URL digest filters kept in step with the bookmark table."""
+
+    def __init__(self):
+        self.app = None
+        self.enabled = True
+        self.error_rate = 0.01
+        self.max_bytes = 16 * 1024 * 1024
+        self.rebuild_interval = 600.0
+        self.watermark_refresh = 1.0
+        self.watermark_slack = 20000
+        self.block_max_age = 300.0
+        self._codes = None
+        self._urls = None
+        self._floor = 0
+        self._watermark = None
+        self._watermark_at = None
+        self._added = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._watermark_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._worker = BackgroundWorker(
+            "bloom-rebuild", self._run, self._lock, on_fork=self._forget_parent
+        )
+        self.builds = 0
+        self.build_seconds = 0.0
+        self.code_checks = 0
+        self.code_misses = 0
+        self.code_bypasses = 0
+        self.url_checks = 0
+        self.url_misses = 0
+        self.false_positives = 0
+
+    def init_app(self, app):
+        """Configure sizing and rebuilds from the Flask app config."""
+        app.config.setdefault("BLOOM_FILTER_ENABLED", True)
+        app.config.setdefault("BLOOM_FILTER_FALSE_POSITIVE_RATE", 0.01)
+        app.config.setdefault("BLOOM_FILTER_MAX_BYTES", 16 * 1024 * 1024)
+        app.config.setdefault("BLOOM_FILTER_REBUILD_INTERVAL", 600.0)
+        app.config.setdefault("BLOOM_FILTER_WATERMARK_REFRESH", 1.0)
+        app.config.setdefault("BLOOM_FILTER_WATERMARK_SLACK", 20000)
+        app.config.setdefault("SHORT_CODE_BLOCK_MAX_AGE", 300)
+        self.app = app
+        self.enabled = bool(app.config["BLOOM_FILTER_ENABLED"])
+        self.error_rate = float(app.config["BLOOM_FILTER_FALSE_POSITIVE_RATE"])
+        self.max_bytes = int(app.config["BLOOM_FILTER_MAX_BYTES"])
+        self.rebuild_interval = float(app.config["BLOOM_FILTER_REBUILD_INTERVAL"])
+        self.watermark_refresh = float(app.config["BLOOM_FILTER_WATERMARK_REFRESH"])
+        self.watermark_slack = int(app.config["BLOOM_FILTER_WATERMARK_SLACK"])
+        self.block_max_age = float(app.config["SHORT_CODE_BLOCK_MAX_AGE"])
+        with self._lock:
+            self._codes = self._urls = None
+            self._watermark_at = None
+            self._generation += 1
+        self._wake.set()
+
+    def might_have_code(self, short_url):
+        """Return False only if no bookmark can have ``short_url``."""
+        if not self.enabled:
+            return True
+        self._worker.ensure_started()
+        codes = self._codes
+        self.code_checks += 1
+        if len(short_url) > Bookmark.short_url.type.length:
+            self.code_misses += 1
+            return False
+        if codes is None:
+            self.code_bypasses += 1
+            return True
+        sequence = code_to_sequence(short_url)
+        if sequence is not None and sequence >= self._floor:
+            watermark = self._current_watermark()
+            if watermark is None or sequence < watermark + self.watermark_slack:
+                self.code_bypasses += 1
+                return True
+            self.code_misses += 1
+            return False
+        if short_url in codes:
+            return True
+        self.code_misses += 1
+        return False
+
+    def might_have_url(self, url_hash):
+        """Return False if no bookmark is known to have ``url_hash``."""
+        if not self.enabled:
+            return True
+        self._worker.ensure_started()
+        urls = self._urls
+        self.url_checks += 1
+        if urls is None or url_hash in urls:
+            return True
+        self.url_misses += 1
+        return False
+
+    def add(self, short_url=None, url_hash=None):
+        """Add a committed bookmark's code and/or URL digest."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._added is not None:
+                # A rebuild is scanning; replay this once it swaps in.
+                self._added.append((short_url, url_hash))
+            full = self._add(self._codes, self._urls, short_url, url_hash)
+        if full:
+            self._wake.set()
+
+    def note_miss(self, short_url=None, url_hash=None):
+        """Count a database miss the filter could not rule out."""
+        codes, urls = self._codes, self._urls
+        if ((short_url is not None and codes is not None and short_url in codes
+             and not self._bypassed(short_url))
+                or (url_hash is not None and urls is not None and url_hash in urls)):
+            self.false_positives += 1
+
+    def rebuild(self):
+        """Rebuild both filters from the bookmark table; return the row count."""
+        started = time.perf_counter()
+        cutoff = datetime.now() - timedelta(seconds=2 * self.block_max_age)
+        with self._lock:
+            generation = self._generation
+            self._added = []
+        try:
+            with self.app.app_context():
+                with db.engine.connect() as conn:
+                    total = conn.scalar(select(func.count()).select_from(Bookmark))
+                    capacity = max(total * GROWTH, MIN_CAPACITY)
+                    codes = BloomFilter(capacity, self.error_rate, self.max_bytes)
+                    urls = BloomFilter(capacity, self.error_rate, self.max_bytes)
+                    floor = 0
+                    # Compared in SQL so no row's datetime needs parsing.
+                    rows = conn.execution_options(yield_per=BUILD_BATCH).execute(
+                        select(Bookmark.short_url, Bookmark.url_hash,
+                               Bookmark.created_at < cutoff)
+                    )
+                    for short_url, url_hash, settled in rows:
+                        codes.add(short_url)
+                        if url_hash is not None:
+                            urls.add(url_hash)
+                        if settled:
+                            sequence = code_to_sequence(short_url)
+                            if sequence is not None and sequence >= floor:
+                                floor = sequence + 1
+        except Exception:  # pylint: disable=broad-exception-caught
+            logger.exception("Bloom filter rebuild failed; keeping the previous filters")
+            with self._lock:
+                self._added = None
+            return 0
+        with self._lock:
+            if generation != self._generation:
+                # Reconfigured for another app while scanning.
+                self._added = None
+                return 0
+            for short_url, url_hash in self._added:
+                self._add(codes, urls, short_url, url_hash)
+            self._codes, self._urls, self._floor = codes, urls, floor
+            self._added = None
+        self.builds += 1
+        self.build_seconds = time.perf_counter() - started
+        return codes.count
+
+    def stats(self):
+        """Return filter sizes and check counters."""
+        codes, urls = self._codes, self._urls
+        return {
+            "enabled": self.enabled,
+            "ready": codes is not None,
+            "target_false_positive_rate": self.error_rate,
+            "codes": codes.count if codes else 0,
+            "urls": urls.count if urls else 0,
+            "capacity": codes.capacity if codes else 0,
+            "hashes": codes.hashes if codes else 0,
+            "bytes": (codes.nbytes + urls.nbytes) if codes else 0,
+            "code_false_positive_rate": codes.error_rate() if codes else 0.0,
+            "url_false_positive_rate": urls.error_rate() if urls else 0.0,
+            "sequence_floor": self._floor,
+            "code_checks": self.code_checks,
+            "code_misses": self.code_misses,
+            "code_bypasses": self.code_bypasses,
+            "url_checks": self.url_checks,
+            "url_misses": self.url_misses,
+            "false_positives": self.false_positives,
+            "builds": self.builds,
+            "build_seconds": self.build_seconds,
+        }
+
+    @staticmethod
+    def _add(codes, urls, short_url, url_hash):
+        """Add to ``codes``/``urls``; return True once either is past capacity."""
+        full = False
+        for bloom, key in ((codes, short_url), (urls, url_hash)):
+            if bloom is not None and key is not None:
+                bloom.add(key)
+                full = full or bloom.count > bloom.capacity
+        return full
+
+    def _bypassed(self, short_url):
+        """Return True if ``short_url`` is checked against the database regardless."""
+        sequence = code_to_sequence(short_url)
+        return sequence is not None and sequence >= self._floor
+
+    def _current_watermark(self):
+        """Return the recent sequence value, or None if it is not fresh."""
+        now = time.monotonic()
+        fetched_at = self._watermark_at
+        if fetched_at is not None and now - fetched_at < self.watermark_refresh:
+            return self._watermark
+        if not self._watermark_lock.acquire(blocking=False):
+            # Another request is refreshing; trust the old value only briefly.
+            if fetched_at is not None and now - fetched_at < 2 * self.watermark_refresh:
+                return self._watermark
+            return None
+        try:
+            with db.engine.connect() as conn:
+                self._watermark = current_sequence(conn)
+            self._watermark_at = now
+            return self._watermark
+        finally:
+            self._watermark_lock.release()
+
+    def _forget_parent(self):
+        """Forget a rebuild the parent was running when it forked."""
+        self._added = None
+
+    def _run(self):
+        while True:
+            self._wake.clear()
+            self.rebuild()
+            self._wake.wait(self.rebuild_interval)
+
+
+bookmark_filter = BookmarkFilter()
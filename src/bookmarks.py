@@ -1,33 +1,176 @@
 """Bookmarks routes and management."""
-import validators
+import base64
+import binascii
+import csv
+import io
+import json
+from datetime import datetime, timedelta, timezone
+
 from flask import (
     Blueprint,
+    Response,
+    abort,
+    current_app,
     request,
-    jsonify
+    jsonify,
+    stream_with_context
 )
 from flask_jwt_extended import (
     jwt_required,
     get_jwt_identity
 )
+from sqlalchemy import delete, func, insert, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
 # type: ignore
 from src.constants.http_status_codes import (
     HTTP_200_OK,
     HTTP_201_CREATED,
     HTTP_204_NO_CONTENT,
+    HTTP_207_MULTI_STATUS,
     HTTP_400_BAD_REQUEST,
     HTTP_404_NOT_FOUND,
-    HTTP_409_CONFLICT
+    HTTP_409_CONFLICT,
+    HTTP_413_REQUEST_ENTITY_TOO_LARGE
 )
+from src.analytics import bucket_series, delete_rollups, visit_analytics
+from src.bloom import bookmark_filter
+from src.cache import redirect_cache
 from src.database import (
     Bookmark,
+    User,
+    VisitDaily,
+    VisitHourly,
+    bump_data_version,
     db
 )
+from src.etags import conditional
+from src.replicas import read_router
+from src.search import count_query, fts_enabled, search_plan, search_query, search_terms
+from src.serializers import (
+    BOOKMARK_COLUMNS,
+    BOOKMARK_FIELDS,
+    serialize_bookmark,
+    serialize_bookmarks
+)
+from src.shortcodes import short_codes
+from src.urls import is_valid_url, url_digest
+from src.visits import visit_counter
 # type: ignore
 
 bookmarks = Blueprint("bookmarks", __name__, url_prefix="/api/v1/bookmarks")
 
+# Keep IN lists well under SQLite's bound parameter limit.
+BULK_QUERY_CHUNK = 500
+
+EXPORT_CHUNK = 1000
+
+# Rollup table, bucket width and default range per timeseries granularity.
+TIMESERIES = {
+    "hour": (VisitHourly, timedelta(hours=1), timedelta(hours=48)),
+    "day": (VisitDaily, timedelta(days=1), timedelta(days=30)),
+}
+
+
+def encode_cursor(bookmark):
+    """Return an opaque cursor pointing just after ``bookmark`` (or its row).
+
+    Listing with ``?cursor=`` set to it resumes after that bookmark, the
+    same as following a page's ``next_cursor``.
+    """
+    position = json.dumps([bookmark.created_at.isoformat(), bookmark.id])
+    return base64.urlsafe_b64encode(position.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Return the (created_at, id) position encoded in ``cursor``."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, bookmark_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(bookmark_id)
+    except (TypeError, binascii.Error, UnicodeDecodeError) as error:
+        raise ValueError("Not a valid pagination cursor.") from error
+
+
+def _cursor_page(user_id, cursor, per_page, include_total=False):
+    """Return one keyset page of bookmarks ordered by (created_at, id).
+
+    An empty ``cursor`` starts at the beginning. Unlike OFFSET pagination
+    every page costs the same index range scan, and the total count is only
+    computed when asked for.
+    """
+    if per_page < 1:
+        raise ValueError("per_page must be positive.")
+
+    query = (
+        select(*BOOKMARK_COLUMNS)
+        .where(Bookmark.user_id == user_id)
+        .order_by(Bookmark.created_at, Bookmark.id)
+        .limit(per_page + 1)
+    )
+    if cursor:
+        query = query.where(
+            tuple_(Bookmark.created_at, Bookmark.id) > decode_cursor(cursor)
+        )
+
+    bind = read_router.bind_arguments(user_id)
+    rows = db.session.execute(query, bind_arguments=bind).all()
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+
+    meta = {
+        "per_page": per_page,
+        "next_cursor": encode_cursor(rows[-1]) if has_next else None,
+        "has_next": has_next
+    }
+    if include_total:
+        meta["total_count"] = _bookmark_count(user_id, bind)
+    return rows, meta
+
+
+def _bookmark_count(user_id, bind):
+    """Return ``user_id``'s bookmark count from its counter column."""
+    return db.session.scalar(
+        select(User.bookmarks_count).where(User.id == user_id), bind_arguments=bind
+    ) or 0
+
+
+def _offset_page(user_id, page, per_page):
+    """Return one OFFSET page of ``user_id``'s bookmarks and its meta.
+
+    Mirrors ``paginate()``, including the 404 for out-of-range pages, but
+    runs its queries on the read bind chosen by ``read_router``.
+    """
+    if page < 1 or per_page < 1:
+        abort(HTTP_404_NOT_FOUND)
+
+    bind = read_router.bind_arguments(user_id)
+    rows = db.session.execute(
+        select(*BOOKMARK_COLUMNS)
+        .where(Bookmark.user_id == user_id)
+        .limit(per_page)
+        .offset((page - 1) * per_page),
+        bind_arguments=bind
+    ).all()
+    if not rows and page != 1:
+        abort(HTTP_404_NOT_FOUND)
+    total = _bookmark_count(user_id, bind)
+
+    pages = -(-total // per_page)
+    return rows, {
+        "page": page,
+        "pages": pages,
+        "total_count": total,
+        "per_page": per_page,
+        "prev_page": page - 1 if page > 1 else None,
+        "next_page": page + 1 if page < pages else None,
+        "has_prev": page > 1,
+        "has_next": page < pages
+    }
+
+
 @bookmarks.route("/", methods=["POST", "GET"])
 @jwt_required()
+@conditional
 def handle_bookmarks():
     """Get all bookmarks for the current user."""
     current_user = get_jwt_identity()
@@ -38,12 +181,12 @@ def handle_bookmarks():
     if request.method == "POST":
         body = request.get_json().get('body', '')
         url = request.get_json().get('url', '')
-        if not validators.url(url):
+        if not is_valid_url(url):
             return jsonify({
                 "error": "Not a valid URL, please enter a valid URL."
             }), HTTP_400_BAD_REQUEST
 
-        if Bookmark.query.filter_by(url=url).first() is not None:
+        if _url_taken(url_digest(url)):
             return jsonify({
                 "error": "Bookmark URL already exists."
             }), HTTP_409_CONFLICT
@@ -54,58 +197,351 @@ def handle_bookmarks():
             user_id=current_user
         )
 
+        bump_data_version(current_user, bookmarks=1)
         db.session.add(bookmark)
-        db.session.commit()
-
-        return jsonify ({
-            'id': bookmark.id,
-            'url': bookmark.url,
-            'short_url': bookmark.short_url,
-            'visits': bookmark.visits,
-            'body': bookmark.body,
-            'created_at': bookmark.created_at,
-            'updated_at': bookmark.updated_at
-        }), HTTP_201_CREATED
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return jsonify({
+                "error": "Bookmark URL already exists."
+            }), HTTP_409_CONFLICT
+        redirect_cache.invalidate(bookmark.short_url)
+        bookmark_filter.add(bookmark.short_url, bookmark.url_hash)
+
+        return jsonify(serialize_bookmark(bookmark)), HTTP_201_CREATED
 
     else:
-        listed_bookmarks = Bookmark.query.filter_by(
-            user_id=current_user
-        ).paginate(page=page, per_page=per_page)
-
-        data = []
-
-        for bookmark in listed_bookmarks.items:
-            data.append({
-                'id': bookmark.id,
-                'url': bookmark.url,
-                'short_url': bookmark.short_url,
-                'visits': bookmark.visits,
-                'body': bookmark.body,
-                'created_at': bookmark.created_at,
-                'updated_at': bookmark.updated_at
-        })
-
-        meta = {
-            "page": listed_bookmarks.page,
-            "pages": listed_bookmarks.pages,
-            "total_count": listed_bookmarks.total,
-            "per_page": listed_bookmarks.per_page,
-            "prev_page": listed_bookmarks.prev_num,
-            "next_page": listed_bookmarks.next_num,
-            "has_prev": listed_bookmarks.has_prev,
-            "has_next": listed_bookmarks.has_next
-        }
+        cursor = request.args.get('cursor')
+
+        if cursor is not None:
+            if per_page < 1:
+                return jsonify({
+                    "error": "per_page must be a positive integer."
+                }), HTTP_400_BAD_REQUEST
+            include_total = request.args.get('include_total', 0, type=int)
+            try:
+                listed_bookmarks, meta = _cursor_page(
+                    current_user, cursor, per_page, include_total
+                )
+            except ValueError:
+                return jsonify({
+                    "error": "Not a valid pagination cursor."
+                }), HTTP_400_BAD_REQUEST
+        else:
+            listed_bookmarks, meta = _offset_page(current_user, page, per_page)
+
+        data = serialize_bookmarks(listed_bookmarks)
 
     return jsonify({"data": data, "meta": meta}), HTTP_200_OK
 
+@bookmarks.post("/bulk")
+@jwt_required()
+def bulk_create_bookmarks():
+    """Create many bookmarks for the current user in one transaction.
+
+    Accepts a JSON array (of objects with ``url``/``body`` or of bare URL
+    strings) or an NDJSON body. Duplicates are detected with one set-based
+    ``IN`` query per chunk, short codes are allocated in bulk and all rows
+    are inserted with a single executemany. The response reports the
+    outcome of every item by its position in the request.
+    """
+    current_user = get_jwt_identity()
+    max_items = current_app.config.get("BULK_IMPORT_MAX_ITEMS", 10000)
+
+    try:
+        items = _parse_bulk_items()
+    except ValueError:
+        return jsonify({
+            "error": "Body must be a JSON array or NDJSON of bookmarks."
+        }), HTTP_400_BAD_REQUEST
+
+    if len(items) > max_items:
+        return jsonify({
+            "error": f"Too many bookmarks, at most {max_items} per request."
+        }), HTTP_413_REQUEST_ENTITY_TOO_LARGE
+
+    results = [None] * len(items)
+    candidates = {}
+
+    for index, item in enumerate(items):
+        if isinstance(item, str):
+            item = {'url': item}
+        url = item.get('url', '') if isinstance(item, dict) else ''
+        if not isinstance(url, str) or not is_valid_url(url):
+            results[index] = {
+                'index': index,
+                'status': 'invalid',
+                'error': "Not a valid URL, please enter a valid URL."
+            }
+            continue
+        body = item.get('body')
+        if body is not None and not isinstance(body, str):
+            results[index] = {
+                'index': index,
+                'url': url,
+                'status': 'invalid',
+                'error': "Body must be a string or null."
+            }
+            continue
+
+        digest = url_digest(url)
+        if digest in candidates:
+            results[index] = {
+                'index': index,
+                'url': url,
+                'status': 'duplicate',
+                'error': "Bookmark URL appears earlier in this request."
+            }
+        else:
+            candidates[digest] = (index, url, body or '')
+
+    _drop_existing(candidates, results, screened=True)
+
+    inserted = []
+    for attempt in range(2):
+        if not candidates:
+            break
+        try:
+            inserted = _insert_bulk(current_user, candidates)
+            break
+        except IntegrityError:
+            db.session.rollback()
+            if attempt:
+                return jsonify({
+                    "error": "Bookmark URLs were added concurrently, please retry."
+                }), HTTP_409_CONFLICT
+            # Another process may have added a URL the filter rules out.
+            _drop_existing(candidates, results, screened=False)
+
+    for (digest, (index, url, _)), row in zip(candidates.items(), inserted):
+        redirect_cache.invalidate(row.short_url)
+        bookmark_filter.add(row.short_url, digest)
+        results[index] = {
+            'index': index,
+            'url': url,
+            'status': 'created',
+            'id': row.id,
+            'short_url': row.short_url
+        }
+
+    meta = {
+        'created': len(candidates),
+        'duplicates': sum(1 for result in results if result['status'] == 'duplicate'),
+        'invalid': sum(1 for result in results if result['status'] == 'invalid')
+    }
+    status = HTTP_201_CREATED if meta['created'] == len(items) else HTTP_207_MULTI_STATUS
+
+    return jsonify({"data": results, "meta": meta}), status
+
+
+def _drop_existing(candidates, results, screened):
+    """Move ``candidates`` whose URL digest is already stored into ``results``.
+
+    Looks the digests up in one ``IN`` query per chunk. With ``screened``
+    only digests the URL filter cannot rule out are looked up; otherwise
+    all are, and those found are added to the filter.
+    """
+    digests = [
+        digest for digest in candidates
+        if not screened or bookmark_filter.might_have_url(digest)
+    ]
+    existing = set()
+    for offset in range(0, len(digests), BULK_QUERY_CHUNK):
+        existing.update(db.session.scalars(
+            select(Bookmark.url_hash).where(
+                Bookmark.url_hash.in_(digests[offset:offset + BULK_QUERY_CHUNK])
+            )
+        ))
+
+    for digest in existing:
+        if not screened:
+            bookmark_filter.add(url_hash=digest)
+        index, url, _ = candidates.pop(digest)
+        results[index] = {
+            'index': index,
+            'url': url,
+            'status': 'duplicate',
+            'error': "Bookmark URL already exists."
+        }
+
+
+def _insert_bulk(user_id, candidates):
+    """Insert ``candidates`` with one executemany and commit; return the new rows."""
+    codes = short_codes.allocate_many(len(candidates))
+    rows = [
+        {'url': url, 'url_hash': digest, 'body': body, 'short_url': code,
+         'visits': 0, 'user_id': user_id}
+        for (digest, (_, url, body)), code in zip(candidates.items(), codes)
+    ]
+    inserted = db.session.execute(
+        insert(Bookmark).returning(
+            Bookmark.id, Bookmark.short_url, sort_by_parameter_order=True
+        ),
+        rows
+    ).all()
+    bump_data_version(user_id, bookmarks=len(inserted))
+    db.session.commit()
+    return inserted
+
+
+def _url_taken(digest, exclude_id=None):
+    """Return True if another bookmark already has the URL ``digest``."""
+    if not bookmark_filter.might_have_url(digest):
+        return False
+    query = select(Bookmark.id).where(Bookmark.url_hash == digest)
+    if exclude_id is not None:
+        query = query.where(Bookmark.id != exclude_id)
+    if db.session.scalar(query.limit(1)) is not None:
+        return True
+    bookmark_filter.note_miss(url_hash=digest)
+    return False
+
+
+def _parse_bulk_items():
+    """Return the list of items posted to the bulk endpoint."""
+    if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        return [
+            json.loads(line)
+            for line in request.get_data(as_text=True).splitlines()
+            if line.strip()
+        ]
+    items = request.get_json(silent=True)
+    if not isinstance(items, list):
+        raise ValueError("Expected a JSON array.")
+    return items
+
+@bookmarks.get("/export")
+@jwt_required()
+def export_bookmarks():
+    """Stream all bookmarks of the current user as NDJSON or CSV.
+
+    Rows are fetched in ``yield_per`` chunks and written out as they
+    arrive, so memory use does not depend on the number of bookmarks and
+    the first bytes go out before the whole result set has been read.
+    """
+    current_user = get_jwt_identity()
+    export_format = request.args.get('format', 'ndjson').lower()
+
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({
+            "error": "Not a valid export format, please use ndjson or csv."
+        }), HTTP_400_BAD_REQUEST
+
+    query = select(*BOOKMARK_COLUMNS).where(
+        Bookmark.user_id == current_user
+    ).order_by(Bookmark.id).execution_options(yield_per=EXPORT_CHUNK)
+
+    def generate_rows():
+        for partition in db.session.execute(query).partitions():
+            for record in serialize_bookmarks(partition):
+                for column in ('created_at', 'updated_at'):
+                    if record[column] is not None:
+                        record[column] = record[column].isoformat()
+                yield record
+
+    mimetype, encode = EXPORT_FORMATS[export_format]
+    return Response(
+        stream_with_context(encode(generate_rows())),
+        mimetype=mimetype,
+        headers={
+            "Content-Disposition":
+                f"attachment; filename=bookmarks.{export_format}"
+        }
+    )
+
+
+def _encode_ndjson(records):
+    """Yield one JSON document per line for each record."""
+    for record in records:
+        yield json.dumps(record) + "\n"
+
+
+def _encode_csv(records):
+    """Yield a CSV header followed by one line per record."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=BOOKMARK_FIELDS)
+    writer.writeheader()
+    for record in records:
+        writer.writerow(record)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', _encode_ndjson),
+    'csv': ('text/csv', _encode_csv)
+}
+
+@bookmarks.get("/search")
+@jwt_required()
+@conditional
+def search_bookmarks():
+    """Search the current user's bookmarks by URL and body text.
+
+    Terms are ANDed together; a trailing ``*`` makes a term a prefix match.
+    Results are ranked by relevance (for terms common across all users,
+    among the user's newest ``SEARCH_MAX_CANDIDATES`` matches) and
+    paginated with ``page`` and ``per_page``; ``include_total=1`` adds the
+    number of matches.
+    """
+    current_user = get_jwt_identity()
+    terms = search_terms(request.args.get('q', ''))
+    if not terms:
+        return jsonify({
+            "error": "Please provide a search query in 'q'."
+        }), HTTP_400_BAD_REQUEST
+
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', 10, type=int), 1), 100)
+    use_fts = fts_enabled(current_app, db.engine)
+    bind = read_router.bind_arguments(current_user)
+    by_owner, floor = False, None
+    if use_fts:
+        by_owner, floor = search_plan(
+            lambda query: db.session.scalar(query, bind_arguments=bind),
+            current_user, terms, current_app.config.get("SEARCH_MAX_CANDIDATES", 1000)
+        )
+
+    rows = db.session.execute(
+        search_query(current_user, terms, use_fts, by_owner, floor)
+        .limit(per_page + 1)
+        .offset((page - 1) * per_page),
+        bind_arguments=bind
+    ).all()
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+
+    meta = {
+        "page": page,
+        "per_page": per_page,
+        "prev_page": page - 1 if page > 1 else None,
+        "next_page": page + 1 if has_next else None,
+        "has_prev": page > 1,
+        "has_next": has_next
+    }
+    if request.args.get('include_total', 0, type=int):
+        meta["total_count"] = db.session.scalar(
+            count_query(current_user, terms, use_fts, by_owner), bind_arguments=bind
+        )
+
+    return jsonify({"data": serialize_bookmarks(rows), "meta": meta}), HTTP_200_OK
+
+
 @bookmarks.get("/<int:bookmark_id>")
 @jwt_required()
+@conditional
 def get_bookmark(bookmark_id):
     """Get a specific bookmark by ID for the current user."""
     current_user = get_jwt_identity()
-    bookmark = Bookmark.query.filter_by(
-        id=bookmark_id,
-        user_id=current_user
+    bookmark = db.session.execute(
+        select(*BOOKMARK_COLUMNS).where(
+            Bookmark.id == bookmark_id,
+            Bookmark.user_id == current_user
+        ),
+        bind_arguments=read_router.bind_arguments(current_user)
     ).first()
 
     if not bookmark:
@@ -113,99 +549,444 @@ def get_bookmark(bookmark_id):
             "error": "Bookmark not found."
         }), HTTP_404_NOT_FOUND
 
-    return jsonify ({
-        'id': bookmark.id,
-        'url': bookmark.url,
-        'short_url': bookmark.short_url,
-        'visits': bookmark.visits,
-        'body': bookmark.body,
-        'created_at': bookmark.created_at,
-        'updated_at': bookmark.updated_at
-    }), HTTP_200_OK
+    return jsonify(serialize_bookmarks([bookmark])[0]), HTTP_200_OK
 
 
 @bookmarks.put("/<int:bookmark_id>")
 @bookmarks.patch("/<int:bookmark_id>")
 @jwt_required()
 def edit_bookmark(bookmark_id):
-    """Edit a specific bookmark by ID for the current user."""
-    current_user = get_jwt_identity()
-    bookmark = Bookmark.query.filter_by(
-        id=bookmark_id,
-        user_id=current_user
-    ).first()
+    """Edit a specific bookmark by ID for the current user.
 
-    if not bookmark:
+    PUT replaces ``url`` and ``body``; PATCH changes only the fields it is
+    given. Either way the change is a single ``UPDATE ... WHERE id AND
+    user_id`` (returning the new row where supported), and a duplicate
+    URL is caught by the unique digest index.
+    """
+    current_user = get_jwt_identity()
+    data = request.get_json(silent=True)
+    if data is None:
+        data = {}
+    if not isinstance(data, dict):
+        return jsonify({
+            "error": "Expected a JSON object."
+        }), HTTP_400_BAD_REQUEST
+    if request.method == "PUT":
+        data = {"url": data.get('url', ''), "body": data.get('body', '')}
+
+    values = {}
+    if 'body' in data:
+        if data['body'] is not None and not isinstance(data['body'], str):
+            return _invalid_body()
+        values['body'] = data['body']
+    if 'url' in data:
+        if not isinstance(data['url'], str) or not is_valid_url(data['url']):
+            return jsonify({
+                "error": "Not a valid URL, please enter a valid URL."
+            }), HTTP_400_BAD_REQUEST
+        values['url'] = data['url']
+        values['url_hash'] = url_digest(data['url'])
+
+    if values:
+        try:
+            rows = _update_bookmarks(current_user, [bookmark_id], values)
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return jsonify({
+                "error": "Bookmark URL already exists."
+            }), HTTP_409_CONFLICT
+    else:
+        rows = db.session.execute(
+            select(*BOOKMARK_COLUMNS).where(
+                Bookmark.id == bookmark_id,
+                Bookmark.user_id == current_user
+            )
+        ).all()
+
+    if not rows:
         return jsonify({
             "error": "Bookmark not found."
         }), HTTP_404_NOT_FOUND
+    if 'url' in values:
+        redirect_cache.invalidate(rows[0].short_url)
+        bookmark_filter.add(url_hash=values['url_hash'])
 
-    body = request.get_json().get('body', '')
-    url = request.get_json().get('url', '')
-
-    if not validators.url(url):
-        return jsonify({
-            "error": "Not a valid URL, please enter a valid URL."
-        }), HTTP_400_BAD_REQUEST
-
-    bookmark.body = body
-    bookmark.url = url
-
-    db.session.commit()
-
-    return jsonify ({
-        'id': bookmark.id,
-        'url': bookmark.url,
-        'short_url': bookmark.short_url,
-        'visits': bookmark.visits,
-        'body': bookmark.body,
-        'created_at': bookmark.created_at,
-        'updated_at': bookmark.updated_at
-    }), HTTP_200_OK
+    return jsonify(serialize_bookmarks(rows)[0]), HTTP_200_OK
 
 @bookmarks.delete("/<int:bookmark_id>")
 @jwt_required()
 def delete_bookmark(bookmark_id):
     """Delete a specific bookmark by ID for the current user."""
     current_user = get_jwt_identity()
-    bookmark = Bookmark.query.filter_by(
-        id=bookmark_id,
-        user_id=current_user
-    ).first()
-
-    if not bookmark:
+    deleted = _delete_bookmarks(current_user, [bookmark_id])
+    if not deleted:
+        db.session.rollback()
         return jsonify({
             "error": "Bookmark not found."
         }), HTTP_404_NOT_FOUND
-
-    bookmark_id_deleted = bookmark.id
-    db.session.delete(bookmark)
     db.session.commit()
+    _forget_deleted(current_user, deleted)
 
     return jsonify(
-        {"message": "Bookmark " + str(bookmark_id_deleted) + " deleted successfully."}
+        {"message": "Bookmark " + str(bookmark_id) + " deleted successfully."}
     ), HTTP_204_NO_CONTENT
 
+
+@bookmarks.patch("/batch")
+@jwt_required()
+def batch_update_bookmarks():
+    """Set ``body`` on many of the current user's bookmarks at once.
+
+    Expects ``{"ids": [...], "body": "..."}`` and runs one UPDATE in one
+    transaction. URLs are unique, so they can only be edited one by one.
+    """
+    current_user = get_jwt_identity()
+    payload = request.get_json(silent=True)
+    ids, error = _parse_batch_ids(payload)
+    if error:
+        return error
+    if 'url' in payload or 'body' not in payload:
+        return jsonify({
+            "error": "Only 'body' can be updated in a batch."
+        }), HTTP_400_BAD_REQUEST
+    if payload['body'] is not None and not isinstance(payload['body'], str):
+        return _invalid_body()
+
+    rows = _update_bookmarks(current_user, ids, {'body': payload['body']},
+                             columns=(Bookmark.id,))
+    db.session.commit()
+    updated = sorted(row.id for row in rows)
+    return jsonify({
+        "updated": updated,
+        "not_found": sorted(set(ids).difference(updated))
+    }), HTTP_200_OK
+
+
+@bookmarks.delete("/batch")
+@jwt_required()
+def batch_delete_bookmarks():
+    """Delete many of the current user's bookmarks at once.
+
+    Expects ``{"ids": [...]}`` and runs one DELETE in one transaction,
+    together with the counter, rollup and data version updates.
+    """
+    current_user = get_jwt_identity()
+    ids, error = _parse_batch_ids(request.get_json(silent=True))
+    if error:
+        return error
+
+    deleted = _delete_bookmarks(current_user, ids)
+    db.session.commit()
+    _forget_deleted(current_user, deleted)
+    deleted_ids = sorted(row.id for row in deleted)
+    return jsonify({
+        "deleted": deleted_ids,
+        "not_found": sorted(set(ids).difference(deleted_ids))
+    }), HTTP_200_OK
+
+
+def _invalid_body():
+    """Return the 400 response for a ``body`` that is not a string or null."""
+    return jsonify({
+        "error": "Body must be a string or null."
+    }), HTTP_400_BAD_REQUEST
+
+
+def _parse_batch_ids(payload):
+    """Return ``(ids, None)`` from a batch payload, or ``(None, error response)``."""
+    ids = payload.get('ids') if isinstance(payload, dict) else None
+    if (not isinstance(ids, list) or not ids
+            or any(isinstance(item, bool) or not isinstance(item, int) for item in ids)):
+        return None, (jsonify({
+            "error": "Expected a JSON object with a non-empty 'ids' list of integers."
+        }), HTTP_400_BAD_REQUEST)
+
+    max_items = current_app.config.get("BATCH_MAX_ITEMS", 10000)
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > max_items:
+        return None, (jsonify({
+            "error": f"Too many ids; the limit is {max_items} per request."
+        }), HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+    return ids, None
+
+
+def _update_bookmarks(user_id, ids, values, columns=BOOKMARK_COLUMNS):
+    """Apply ``values`` to ``user_id``'s bookmarks among ``ids`` in one UPDATE.
+
+    Returns the updated rows as ``columns`` and bumps the data version if
+    any matched; the caller commits.
+    """
+    owned = (Bookmark.user_id == user_id, Bookmark.id.in_(ids))
+    stmt = (
+        update(Bookmark)
+        .where(*owned)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    if db.session.get_bind().dialect.update_returning:
+        rows = db.session.execute(stmt.returning(*columns)).all()
+    elif db.session.execute(stmt).rowcount:
+        rows = db.session.execute(select(*columns).where(*owned)).all()
+    else:
+        rows = []
+    if rows:
+        bump_data_version(user_id)
+    return rows
+
+
+def _delete_bookmarks(user_id, ids):
+    """Delete ``user_id``'s bookmarks among ``ids`` in one DELETE.
+
+    Returns the deleted ``(id, short_url, visits)`` rows and adjusts the
+    user's counters, data version and the analytics rollups in the same
+    transaction; the caller commits.
+    """
+    owned = (Bookmark.user_id == user_id, Bookmark.id.in_(ids))
+    columns = (Bookmark.id, Bookmark.short_url, Bookmark.visits)
+    stmt = delete(Bookmark).where(*owned).execution_options(synchronize_session=False)
+    if db.session.get_bind().dialect.delete_returning:
+        deleted = db.session.execute(stmt.returning(*columns)).all()
+    else:
+        deleted = db.session.execute(select(*columns).where(*owned).with_for_update()).all()
+        db.session.execute(stmt)
+    if deleted:
+        bump_data_version(
+            user_id,
+            bookmarks=-len(deleted),
+            visits=-sum(row.visits or 0 for row in deleted)
+        )
+        delete_rollups([row.id for row in deleted])
+    return deleted
+
+
+def _forget_deleted(user_id, deleted):
+    """Drop cached redirects and unflushed visits of committed deletes."""
+    for row in deleted:
+        redirect_cache.invalidate(row.short_url)
+        visit_counter.discard(row.short_url, user_id)
+
 @bookmarks.get('/stats')
 @jwt_required()
+@conditional
 def get_stats():
-    """Get statistics for the current user."""
+    """Get statistics for the current user.
+
+    Totals come from the user's counter columns, or are aggregated in the
+    database when a date range is given; so is the top-N list. Per-link rows
+    come from a column-only query, paginated when ``page`` or ``per_page``
+    is given and otherwise streamed as one JSON document, a chunk of rows
+    at a time, so memory use does not grow with the number of bookmarks.
+    ``start`` and ``end`` (ISO dates) restrict everything to bookmarks
+    created in that range.
+    """
     current_user = get_jwt_identity()
 
-    data = []
+    top = request.args.get('top', 5, type=int)
+    try:
+        start = _parse_date_arg('start')
+        end = _parse_date_arg('end')
+    except ValueError:
+        return jsonify({
+            "error": "Not a valid date, please use ISO 8601 (YYYY-MM-DD)."
+        }), HTTP_400_BAD_REQUEST
 
-    items = Bookmark.query.filter_by(user_id=current_user).all()
+    conditions = [Bookmark.user_id == current_user]
+    if start is not None:
+        conditions.append(Bookmark.created_at >= start)
+    if end is not None:
+        conditions.append(Bookmark.created_at < end)
 
-    for item in items:
-        new_link = {
-            'visits': item.visits,
-            'url': item.url,
-            'short_url': item.short_url,
-            'id': item.id
+    bind = read_router.bind_arguments(current_user)
+    if start is None and end is None:
+        totals = select(User.bookmarks_count, User.total_visits).where(User.id == current_user)
+    else:
+        totals = select(
+            func.count(), func.coalesce(func.sum(Bookmark.visits), 0)
+        ).where(*conditions)
+    bookmark_count, total_visits = db.session.execute(totals, bind_arguments=bind).one()
+
+    link_columns = select(
+        Bookmark.id, Bookmark.url, Bookmark.short_url, Bookmark.visits
+    ).where(*conditions)
+
+    # Links with unflushed visits may outrank the stored top-N, so merge
+    # them in before ranking.
+    pending = visit_counter.pending_items()
+    pending_links = []
+    if pending:
+        pending_links = db.session.execute(
+            link_columns.where(Bookmark.short_url.in_(list(pending))),
+            bind_arguments=bind
+        ).all()
+        total_visits += sum(pending[row.short_url] for row in pending_links)
+
+    top = max(top, 0)
+    candidates = {row.id: _stats_link(row) for row in pending_links}
+    for row in db.session.execute(
+        link_columns.order_by(Bookmark.visits.desc(), Bookmark.id).limit(top),
+        bind_arguments=bind
+    ):
+        candidates.setdefault(row.id, _stats_link(row))
+    top_links = sorted(
+        candidates.values(), key=lambda link: (-link['visits'], link['id'])
+    )[:top]
+
+    summary = {
+        'bookmark_count': bookmark_count,
+        'total_visits': total_visits,
+        'top': top_links
+    }
+
+    if 'page' not in request.args and 'per_page' not in request.args:
+        query = link_columns.order_by(Bookmark.id).execution_options(yield_per=EXPORT_CHUNK)
+        return Response(
+            stream_with_context(_stream_stats(query, bind, summary)),
+            mimetype='application/json'
+        )
+
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = max(request.args.get('per_page', 20, type=int), 1)
+    rows = db.session.execute(
+        link_columns.order_by(Bookmark.id)
+        .limit(per_page)
+        .offset((page - 1) * per_page),
+        bind_arguments=bind
+    )
+    meta = {
+        "page": page,
+        "pages": -(-bookmark_count // per_page),
+        "per_page": per_page,
+        "total_count": bookmark_count
+    }
+    return jsonify({
+        'data': [_stats_link(row) for row in rows],
+        'summary': summary,
+        'meta': meta
+    }), HTTP_200_OK
+
+
+def _stream_stats(query, bind, summary):
+    """Yield a ``{"data": [...], "summary": ...}`` document chunk by chunk.
+
+    Rows are fetched in ``yield_per`` partitions and each one is encoded
+    and sent before the next is read, as ``/export`` does.
+    """
+    dumps = current_app.json.dumps
+    separator = ''
+    yield '{"data":['
+    for partition in db.session.execute(query, bind_arguments=bind).partitions():
+        yield separator + ','.join(dumps(_stats_link(row)) for row in partition)
+        separator = ','
+    yield '],"summary":' + dumps(summary) + '}\n'
+
+
+@bookmarks.get('/stats/<int:bookmark_id>/timeseries')
+@jwt_required()
+def get_timeseries(bookmark_id):
+    """Get visits per hour or day for one of the current user's bookmarks.
+
+    Reads only the rollup tables (plus this process's unflushed events),
+    so the cost depends on the number of buckets in the range, not on how
+    many visits they hold. Buckets are UTC and empty ones are omitted;
+    hourly data is only kept for the hourly retention window.
+    """
+    current_user = get_jwt_identity()
+
+    granularity = request.args.get('granularity', 'day')
+    if granularity not in TIMESERIES:
+        return jsonify({
+            "error": "Not a valid granularity, please use 'hour' or 'day'."
+        }), HTTP_400_BAD_REQUEST
+    model, width, default_range = TIMESERIES[granularity]
+
+    try:
+        start = _parse_date_arg('start')
+        end = _parse_date_arg('end')
+    except ValueError:
+        return jsonify({
+            "error": "Not a valid date, please use ISO 8601 (YYYY-MM-DD)."
+        }), HTTP_400_BAD_REQUEST
+    end = _bucket_ceil(_as_utc(end or datetime.now(timezone.utc)), width)
+    start = _bucket_floor(_as_utc(start) if start else end - default_range, width)
+    if start >= end:
+        return jsonify({
+            "error": "'start' must be before 'end'."
+        }), HTTP_400_BAD_REQUEST
+
+    bind = read_router.bind_arguments(current_user)
+    owned = db.session.scalar(
+        select(Bookmark.id).where(
+            Bookmark.id == bookmark_id,
+            Bookmark.user_id == current_user
+        ),
+        bind_arguments=bind
+    )
+    if owned is None:
+        return jsonify({
+            "error": "Bookmark not found."
+        }), HTTP_404_NOT_FOUND
+
+    lower, upper = (start, end) if granularity == "hour" else (start.date(), end.date())
+    rows = db.session.execute(
+        select(model.bucket, model.visits)
+        .where(model.bookmark_id == bookmark_id, model.bucket >= lower, model.bucket < upper)
+        .order_by(model.bucket),
+        bind_arguments=bind
+    ).all()
+    series = bucket_series(
+        rows, visit_analytics.pending_for(bookmark_id), granularity, start, end
+    )
+
+    return jsonify({
+        "data": [
+            {"bucket": bucket.isoformat(), "visits": visits} for bucket, visits in series
+        ],
+        "meta": {
+            "bookmark_id": bookmark_id,
+            "granularity": granularity,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "timezone": "UTC",
+            "total_visits": sum(visits for _, visits in series)
         }
-        data.append(new_link)
+    }), HTTP_200_OK
+
+
+def _as_utc(value):
+    """Return ``value`` as a naive UTC datetime (naive input is taken as UTC)."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _bucket_floor(value, width):
+    """Round ``value`` down to the start of its hour or day bucket."""
+    value = value.replace(minute=0, second=0, microsecond=0)
+    return value.replace(hour=0) if width >= timedelta(days=1) else value
+
+
+def _bucket_ceil(value, width):
+    """Round ``value`` up to the next bucket boundary unless it is on one."""
+    floor = _bucket_floor(value, width)
+    return floor if floor == value else floor + width
+
+
+def _parse_date_arg(name):
+    """Return the ISO date/datetime query argument ``name``, or None."""
+    value = request.args.get(name)
+    return datetime.fromisoformat(value) if value else None
+
+
+def _stats_link(row):
+    """Return the stats representation of a (id, url, short_url, visits) row."""
+    return {
+        'visits': visit_counter.total(row.short_url, row.visits),
+        'url': row.url,
+        'short_url': row.short_url,
+        'id': row.id
+    }
 
-    return jsonify({'data': data}), HTTP_200_OK
 
 @bookmarks.route("/ping", methods=["GET"])
 def ping():
@@ -0,0 +1,90 @@
+"""In-process LRU/TTL cache for the short URL redirect hot path."""
+import threading
+import time
+from collections import OrderedDict
+
+
+class RedirectCache:
+    """Bounded LRU cache mapping short URL codes to redirect targets.
+
+    Entries expire after ``ttl`` seconds so that edits made by other worker
+    processes are eventually picked up; writes made by this process
+    invalidate the affected code immediately.
+    """
+
+    def __init__(self, maxsize=10000, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def init_app(self, app):
+        """Configure the cache from the Flask app config."""
+        app.config.setdefault("REDIRECT_CACHE_SIZE", 10000)
+        app.config.setdefault("REDIRECT_CACHE_TTL", 300)
+        with self._lock:
+            self.maxsize = int(app.config["REDIRECT_CACHE_SIZE"])
+            self.ttl = float(app.config["REDIRECT_CACHE_TTL"])
+            self._entries.clear()
+
+    def get(self, short_url):
+        """Return the cached entry for ``short_url`` or None on a miss."""
+        now = time.monotonic()
+        with self._lock:
+            item = self._entries.get(short_url)
+            if item is None:
+                self.misses += 1
+                return None
+            expires_at, entry = item
+            if expires_at <= now:
+                del self._entries[short_url]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(short_url)
+            self.hits += 1
+            return entry
+
+    def set(self, short_url, entry):
+        """Store ``entry`` for ``short_url``, evicting the oldest if full."""
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[short_url] = (expires_at, entry)
+            self._entries.move_to_end(short_url)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, short_url):
+        """Drop ``short_url`` from the cache if present."""
+        with self._lock:
+            self._entries.pop(short_url, None)
+
+    def clear(self):
+        """Drop every cached entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return hit/miss/eviction counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+
+redirect_cache = RedirectCache()
@@ -0,0 +1,260 @@
+"""Flask CLI commands for database maintenance."""
+import click
+from sqlalchemy import bindparam, func, inspect, or_, select, text, update
+from sqlalchemy.exc import DBAPIError, IntegrityError, OperationalError
+from sqlalchemy.schema import CreateColumn
+
+from src.database import Bookmark, User, db
+from src.search import fts_available, install_search_index, needs_rebuild, rebuild_search_index
+from src.urls import url_digest
+
+BACKFILL_CHUNK = 1000
+# Columns that start at their server default and need reconciling once added.
+COUNTER_COLUMNS = {"user.bookmarks_count", "user.total_visits"}
+
+
+def upgrade_schema(engine):
+    """Bring an existing database in line with the models, in place.
+
+    Creates missing tables, adds missing columns, widens string columns
+    the models have since lengthened and creates missing indexes. Existing
+    rows are only touched to fill columns derived from them: URL digests,
+    user counters and the search index. Returns a list of ``(action, detail, error)``
+    tuples describing what was done.
+    """
+    actions = []
+    added_columns = set()
+    db.metadata.create_all(engine)
+    inspector = inspect(engine)
+
+    for table in db.metadata.sorted_tables:
+        existing_columns = {column["name"]: column for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing_columns:
+                # SQLite does not enforce string lengths.
+                if (engine.dialect.name != "sqlite"
+                        and _needs_widening(column, existing_columns[column.name])):
+                    actions.append(widen_column(engine, table, column))
+                continue
+            ddl = CreateColumn(column).compile(dialect=engine.dialect)
+            name = engine.dialect.identifier_preparer.format_table(table)
+            with engine.begin() as conn:
+                conn.execute(text(f"ALTER TABLE {name} ADD COLUMN {ddl}"))
+            actions.append(("add column", f"{table.name}.{column.name}", None))
+            added_columns.add(f"{table.name}.{column.name}")
+
+        existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            if index.name in existing_indexes:
+                continue
+            try:
+                with engine.begin() as conn:
+                    index.create(conn)
+            except (IntegrityError, OperationalError) as error:
+                actions.append(("create index", index.name, str(error.orig)))
+                continue
+            actions.append(("create index", index.name, None))
+
+    if "bookmark.url_hash" in added_columns:
+        filled, duplicate_ids = backfill_url_hashes(engine)
+        actions.append(("backfill url hash", f"{filled} rows", None))
+        if duplicate_ids:
+            actions.append((
+                "backfill url hash",
+                f"{len(duplicate_ids)} bookmarks duplicate an earlier URL and were left "
+                f"without a digest: {', '.join(map(str, duplicate_ids))}",
+                None,
+            ))
+
+    if added_columns & COUNTER_COLUMNS:
+        actions.append(("reconcile counters", f"{reconcile_user_counters(engine)} users", None))
+
+    install_search_index(engine)
+    if needs_rebuild(engine):
+        actions.append(("rebuild search index", f"{rebuild_search_index(engine)} rows", None))
+
+    return actions
+
+
+def _needs_widening(column, existing):
+    """Return True if the database holds ``column`` in fewer characters than the model."""
+    length = getattr(column.type, "length", None)
+    existing_length = getattr(existing["type"], "length", None)
+    return length is not None and existing_length is not None and existing_length < length
+
+
+def widen_column(engine, table, column):
+    """Alter ``column`` to its model length; return an upgrade action tuple.
+
+    Existing rows always fit, so this only rewrites the column type; it
+    keeps nullability and indexes. Handles PostgreSQL and MySQL.
+    """
+    column_type = column.type.compile(dialect=engine.dialect)
+    detail = f"{table.name}.{column.name} to {column_type}"
+    preparer = engine.dialect.identifier_preparer
+    name = preparer.format_table(table)
+    if engine.dialect.name == "postgresql":
+        statement = (f"ALTER TABLE {name} ALTER COLUMN {preparer.format_column(column)} "
+                     f"TYPE {column_type}")
+    elif engine.dialect.name in ("mysql", "mariadb"):
+        # MODIFY replaces the whole definition, so restate NOT NULL etc.
+        statement = (f"ALTER TABLE {name} MODIFY "
+                     f"{CreateColumn(column).compile(dialect=engine.dialect)}")
+    else:
+        return ("widen column", detail, f"alter it by hand on {engine.dialect.name}")
+    try:
+        with engine.begin() as conn:
+            conn.execute(text(statement))
+    except DBAPIError as error:
+        return ("widen column", detail, str(error.orig))
+    return ("widen column", detail, None)
+
+
+@click.command("upgrade-db")
+def upgrade_db_command():
+    """Add missing columns and indexes to an existing database."""
+    actions = upgrade_schema(db.engine)
+    if not actions:
+        click.echo("Database schema is up to date.")
+    failed = False
+    for action, detail, error in actions:
+        if error:
+            failed = True
+            click.echo(f"FAILED {action} {detail}: {error}", err=True)
+        else:
+            click.echo(f"{action} {detail}")
+    if failed:
+        raise click.exceptions.Exit(1)
+
+
+def backfill_url_hashes(engine, chunk_size=BACKFILL_CHUNK):
+    """Fill ``Bookmark.url_hash`` for rows that do not have one yet.
+
+    Rows whose normalized URL duplicates an earlier bookmark keep a NULL
+    digest, since the column is unique. Returns ``(filled, duplicate_ids)``.
+    """
+    table = Bookmark.__table__
+    stmt = (
+        update(table)
+        .where(table.c.id == bindparam("row_id"))
+        .values(url_hash=bindparam("digest"))
+    )
+    filled = 0
+    duplicate_ids = []
+    last_id = 0
+
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(
+                select(table.c.id, table.c.url)
+                .where(table.c.url_hash.is_(None), table.c.id > last_id)
+                .order_by(table.c.id)
+                .limit(chunk_size)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            digests = {}
+            for row in rows:
+                digest = url_digest(row.url)
+                if digest in digests:
+                    duplicate_ids.append(row.id)
+                else:
+                    digests[digest] = row.id
+            taken = set(conn.scalars(
+                select(table.c.url_hash).where(table.c.url_hash.in_(list(digests)))
+            ))
+            for digest in taken:
+                duplicate_ids.append(digests.pop(digest))
+
+            if digests:
+                conn.execute(stmt, [
+                    {"row_id": row_id, "digest": digest}
+                    for digest, row_id in digests.items()
+                ])
+                filled += len(digests)
+
+    return filled, sorted(duplicate_ids)
+
+
+@click.command("backfill-url-hash")
+def backfill_url_hash_command():
+    """Compute missing normalized URL digests for existing bookmarks."""
+    filled, duplicate_ids = backfill_url_hashes(db.engine)
+    click.echo(f"Filled {filled} URL digests.")
+    if duplicate_ids:
+        click.echo(
+            f"{len(duplicate_ids)} bookmarks duplicate an earlier URL and were "
+            f"left without a digest: {', '.join(map(str, duplicate_ids))}",
+            err=True,
+        )
+
+
+def reconcile_user_counters(engine, chunk_size=BACKFILL_CHUNK):
+    """Recompute ``User.bookmarks_count`` and ``total_visits`` from bookmarks.
+
+    Walks users in id order with one short transaction per chunk and only
+    rewrites users whose counters drifted. Returns how many were fixed.
+    """
+    users = User.__table__
+    bookmarks = Bookmark.__table__
+    actual_count = (
+        select(func.count())
+        .where(bookmarks.c.user_id == users.c.id)
+        .scalar_subquery()
+    )
+    actual_visits = (
+        select(func.coalesce(func.sum(bookmarks.c.visits), 0))
+        .where(bookmarks.c.user_id == users.c.id)
+        .scalar_subquery()
+    )
+    fixed = 0
+    last_id = 0
+
+    while True:
+        with engine.begin() as conn:
+            ids = conn.scalars(
+                select(users.c.id)
+                .where(users.c.id > last_id)
+                .order_by(users.c.id)
+                .limit(chunk_size)
+            ).all()
+            if not ids:
+                break
+            last_id = ids[-1]
+            fixed += conn.execute(
+                update(users)
+                .where(
+                    users.c.id.in_(ids),
+                    or_(users.c.bookmarks_count != actual_count,
+                        users.c.total_visits != actual_visits)
+                )
+                .values(bookmarks_count=actual_count, total_visits=actual_visits)
+            ).rowcount
+
+    return fixed
+
+
+@click.command("reconcile-counters")
+def reconcile_counters_command():
+    """Recompute per-user bookmark and visit counters from the bookmarks."""
+    click.echo(f"Fixed counters for {reconcile_user_counters(db.engine)} users.")
+
+
+@click.command("rebuild-search-index")
+def rebuild_search_index_command():
+    """Re-index every bookmark for full-text search."""
+    install_search_index(db.engine)
+    if not fts_available(db.engine):
+        click.echo("Full-text search needs SQLite FTS5; searches use LIKE matching.")
+        return
+    click.echo(f"Indexed {rebuild_search_index(db.engine)} bookmarks.")
+
+
+def register_commands(app):
+    """Attach the maintenance commands to the Flask CLI."""
+    app.cli.add_command(upgrade_db_command)
+    app.cli.add_command(backfill_url_hash_command)
+    app.cli.add_command(rebuild_search_index_command)
+    app.cli.add_command(reconcile_counters_command)
@@ -0,0 +1,262 @@
+"""Negotiated gzip, brotli and zstd response compression.
+
+Responses whose mimetype is in ``COMPRESS_MIMETYPES`` are compressed with
+the best encoding the client accepts (client q-values first, then the
+order of ``COMPRESS_ALGORITHMS``). Bodies smaller than
+``COMPRESS_MIN_SIZE`` bytes go out as they are. Streamed responses are
+compressed chunk by chunk as they are generated, so exports keep their
+flat memory use. brotli and zstd are optional: brotli needs the
+``brotli`` package and zstd needs Python 3.14's ``compression.zstd`` or
+the ``zstandard`` package.
+
+Views behind ``src.etags.conditional`` have an ETag that changes whenever
+their body can. Their compressed bodies are kept in an LRU bounded by
+``COMPRESS_CACHE_MAX_BYTES``, keyed by ETag and encoding, and a repeat
+request is answered from it without running the view or recompressing.
+"""
+import gzip
+import threading
+import zlib
+from collections import OrderedDict
+
+from flask import Response, g, request
+
+from src.constants.http_status_codes import (
+    HTTP_200_OK, HTTP_204_NO_CONTENT, HTTP_304_NOT_MODIFIED
+)
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    from compression import zstd
+except ImportError:  # pragma: no cover - Python < 3.14
+    zstd = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+DEFAULT_MIMETYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "text/csv",
+    "text/html",
+    "text/plain",
+)
+
+
+class _BrotliStream:
+    """Give ``brotli.Compressor`` the zlib ``compress``/``flush`` interface."""
+
+    def __init__(self, level):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        """Compress ``data``; return whatever output is ready."""
+        return self._compressor.process(data)
+
+    def flush(self):
+        """Finish the stream and return the remaining output."""
+        return self._compressor.finish()
+
+
+def _codecs():
+    """Return {encoding: (compress(data, level), stream(level))} for installed codecs."""
+    codecs = {
+        "gzip": (
+            lambda data, level: gzip.compress(data, compresslevel=level, mtime=0),
+            lambda level: zlib.compressobj(level, zlib.DEFLATED, 31),
+        ),
+    }
+    if brotli is not None:
+        codecs["br"] = (
+            lambda data, level: brotli.compress(data, quality=level),
+            _BrotliStream,
+        )
+    if zstd is not None:
+        codecs["zstd"] = (
+            lambda data, level: zstd.compress(data, level=level),
+            lambda level: zstd.ZstdCompressor(level=level),
+        )
+    elif zstandard is not None:
+        codecs["zstd"] = (
+            lambda data, level: zstandard.ZstdCompressor(level=level).compress(data),
+            lambda level: zstandard.ZstdCompressor(level=level).compressobj(),
+        )
+    return codecs
+
+
+CODECS = _codecs()
+
+
+class ResponseCompressor:
+    """Compress responses in ``after_request`` and cache ETagged bodies."""
+
+    def __init__(self):
+        self.enabled = True
+        self.algorithms = [name for name in ("zstd", "br", "gzip") if name in CODECS]
+        self.levels = {"gzip": 6, "br": 4, "zstd": 3}
+        self.min_size = 1024
+        self.mimetypes = frozenset(DEFAULT_MIMETYPES)
+        self.cache_max_bytes = 32 * 1024 * 1024
+        self._cache = OrderedDict()
+        self._cache_bytes = 0
+        self._lock = threading.Lock()
+        self.compressed = 0
+        self.streamed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cache_hits = 0
+        self.cache_stores = 0
+        self.cache_evictions = 0
+
+    def init_app(self, app):
+        """Configure encodings, levels and the cache; register the hook."""
+        app.config.setdefault("COMPRESS_ENABLED", True)
+        app.config.setdefault("COMPRESS_ALGORITHMS", "zstd,br,gzip")
+        app.config.setdefault("COMPRESS_MIN_SIZE", 1024)
+        app.config.setdefault("COMPRESS_GZIP_LEVEL", 6)
+        app.config.setdefault("COMPRESS_BROTLI_LEVEL", 4)
+        app.config.setdefault("COMPRESS_ZSTD_LEVEL", 3)
+        app.config.setdefault("COMPRESS_MIMETYPES", DEFAULT_MIMETYPES)
+        app.config.setdefault("COMPRESS_CACHE_MAX_BYTES", 32 * 1024 * 1024)
+        self.enabled = bool(app.config["COMPRESS_ENABLED"])
+        algorithms = app.config["COMPRESS_ALGORITHMS"]
+        if isinstance(algorithms, str):
+            algorithms = algorithms.split(",")
+        self.algorithms = [name.strip() for name in algorithms if name.strip() in CODECS]
+        self.levels = {
+            "gzip": int(app.config["COMPRESS_GZIP_LEVEL"]),
+            "br": int(app.config["COMPRESS_BROTLI_LEVEL"]),
+            "zstd": int(app.config["COMPRESS_ZSTD_LEVEL"]),
+        }
+        self.min_size = int(app.config["COMPRESS_MIN_SIZE"])
+        self.mimetypes = frozenset(app.config["COMPRESS_MIMETYPES"])
+        self.cache_max_bytes = int(app.config["COMPRESS_CACHE_MAX_BYTES"])
+        with self._lock:
+            self._cache.clear()
+            self._cache_bytes = 0
+        if self.enabled:
+            app.after_request(self._after_request)
+
+    def negotiate(self):
+        """Return the encoding to use for the current request, or None."""
+        best, best_quality = None, 0
+        for name in self.algorithms:
+            quality = request.accept_encodings.quality(name)
+            if quality > best_quality:
+                best, best_quality = name, quality
+        return best
+
+    def cached(self, etag):
+        """Return a ready response for ``etag`` in the negotiated encoding, or None."""
+        if not self.enabled:
+            return None
+        encoding = self.negotiate()
+        if encoding is None:
+            return None
+        with self._lock:
+            entry = self._cache.get((etag, encoding))
+            if entry is None:
+                return None
+            self._cache.move_to_end((etag, encoding))
+            self.cache_hits += 1
+        body, mimetype = entry
+        response = Response(body, mimetype=mimetype)
+        response.headers["Content-Encoding"] = encoding
+        response.vary.add("Accept-Encoding")
+        return response
+
+    def stats(self):
+        """Return compression ratios and cache counters."""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "algorithms": ",".join(self.algorithms),
+                "compressed": self.compressed,
+                "streamed": self.streamed,
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "ratio": self.bytes_out / self.bytes_in if self.bytes_in else 0.0,
+                "cache_entries": len(self._cache),
+                "cache_bytes": self._cache_bytes,
+                "cache_hits": self.cache_hits,
+                "cache_stores": self.cache_stores,
+                "cache_evictions": self.cache_evictions,
+            }
+
+    def _after_request(self, response):
+        if (response.mimetype not in self.mimetypes
+                or response.status_code < HTTP_200_OK
+                or response.status_code in (HTTP_204_NO_CONTENT, HTTP_304_NOT_MODIFIED)
+                or response.direct_passthrough):
+            return response
+        response.vary.add("Accept-Encoding")
+        if ("Content-Encoding" in response.headers
+                or "no-transform" in response.headers.get("Cache-Control", "")):
+            return response
+        encoding = self.negotiate()
+        if encoding is None:
+            return response
+
+        compress, stream = CODECS[encoding]
+        level = self.levels[encoding]
+        if response.is_streamed:
+            response.response = self._stream(response.response, stream(level))
+            response.headers.pop("Content-Length", None)
+            response.headers["Content-Encoding"] = encoding
+            with self._lock:
+                self.streamed += 1
+            return response
+
+        body = response.get_data()
+        if len(body) < self.min_size:
+            return response
+        compressed = compress(body, level)
+        response.set_data(compressed)
+        response.headers["Content-Encoding"] = encoding
+        with self._lock:
+            self.compressed += 1
+            self.bytes_in += len(body)
+            self.bytes_out += len(compressed)
+        etag = g.get("compress_cache_key")
+        if etag is not None and response.status_code == HTTP_200_OK:
+            self._store((etag, encoding), compressed, response.mimetype)
+        return response
+
+    def _stream(self, chunks, compressor):
+        """Compress ``chunks`` incrementally, closing them when done."""
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode("utf-8")
+                output = compressor.compress(chunk)
+                if output:
+                    yield output
+            yield compressor.flush()
+        finally:
+            if hasattr(chunks, "close"):
+                chunks.close()
+
+    def _store(self, key, body, mimetype):
+        """Cache a compressed body, evicting least recently used entries."""
+        if len(body) > self.cache_max_bytes:
+            return
+        with self._lock:
+            previous = self._cache.pop(key, None)
+            if previous is not None:
+                self._cache_bytes -= len(previous[0])
+            self._cache[key] = (body, mimetype)
+            self._cache_bytes += len(body)
+            self.cache_stores += 1
+            while self._cache_bytes > self.cache_max_bytes:
+                _, (evicted, _) = self._cache.popitem(last=False)
+                self._cache_bytes -= len(evicted)
+                self.cache_evictions += 1
+
+
+response_compressor = ResponseCompressor()
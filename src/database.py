@@ -1,9 +1,9 @@
 """Database models for User and Bookmark."""
 # from enum import unique
 from datetime import datetime
-import string
-import random
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.orm import validates
+from src.urls import url_digest
 
 db = SQLAlchemy()
 
@@ -13,47 +13,114 @@ class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
     email = db.Column(db.Text(), unique=True, nullable=False)
-    password = db.Column(db.String(120), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.now())
-    updated_at = db.Column(db.DateTime, onupdate=datetime.now())
+    password = db.Column(db.String(255), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.now)
+    updated_at = db.Column(db.DateTime, onupdate=datetime.now)
+    # Bumped on every change to the user's bookmarks; drives ETags.
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    # Maintained alongside every bookmark write and visit flush; repaired
+    # by ``flask reconcile-counters``.
+    bookmarks_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    total_visits = db.Column(db.BigInteger, nullable=False, default=0, server_default="0")
     bookmarks = db.relationship("Bookmark", backref="user")
 
     def get_bookmarks_count(self):
         """Return the count of bookmarks for this user."""
-        return len(self.bookmarks)
+        return self.bookmarks_count
 
     def __repr__(self):
         return f"User>>> {self.username}"
 
 
+def bump_data_version(user_id, count=1, bookmarks=0, visits=0):
+    """Mark the bookmarks of ``user_id`` as changed in the current session.
+
+    ``bookmarks`` and ``visits`` (a number or SQL expression) are added to
+    the user's counters in the same UPDATE. Call before committing a write
+    so the bump commits atomically with it.
+    """
+    values = {"data_version": User.data_version + count, "updated_at": User.updated_at}
+    if bookmarks:
+        values["bookmarks_count"] = User.bookmarks_count + bookmarks
+    if not (isinstance(visits, int) and visits == 0):
+        values["total_visits"] = User.total_visits + visits
+    db.session.execute(
+        db.update(User)
+        .where(User.id == user_id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+
+
 class Bookmark(db.Model):
     """Bookmark model for storing user bookmarks with short URLs."""
+    __table_args__ = (
+        db.Index("ix_bookmark_user_id_id", "user_id", "id"),
+        db.Index("ix_bookmark_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
     id = db.Column(db.Integer, primary_key=True)
     body = db.Column(db.Text(), nullable=True)
-    url = db.Column(db.Text(), nullable=False)
-    short_url = db.Column(db.String(3), nullable=False)
+    url = db.Column(db.Text(), nullable=False, index=True)
+    url_hash = db.Column(db.String(64), nullable=True, unique=True, index=True)
+    short_url = db.Column(db.String(16), nullable=False, unique=True, index=True)
     visits = db.Column(db.Integer, default=0)
-    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.now())
-    updated_at = db.Column(db.DateTime, onupdate=datetime.now())
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.now)
+    updated_at = db.Column(db.DateTime, onupdate=datetime.now)
 
     def generate_short_characters(self):
-        """Generate a unique 3-character short URL code."""
-        characters = string.digits + string.ascii_letters
-        picked_chars = "".join(random.choices(characters, k=3))
+        """Allocate a unique short URL code from the short code sequence."""
+        from src.shortcodes import short_codes  # pylint: disable=import-outside-toplevel
+        return short_codes.allocate()
 
-        link = self.query.filter_by(short_url=picked_chars).first()
-
-        if link:
-            # If collision exists, generate a new one recursively
-            return self.generate_short_characters()
-        else:
-            return picked_chars
+    @validates("url")
+    def update_url_hash(self, _key, url):
+        """Keep the normalized URL digest in sync with the URL."""
+        self.url_hash = url_digest(url)
+        return url
 
     def __init__(self, **kwargs):
         """Initialize bookmark with auto-generated short URL."""
         super().__init__(**kwargs)
-        self.short_url = self.generate_short_characters()
+        if self.short_url is None:
+            self.short_url = self.generate_short_characters()
 
     def __repr__(self):
         return f"Bookmark>>> {self.url}"
+
+
+class VisitHourly(db.Model):
+    """Visits to a bookmark per UTC hour, kept for a limited window.
+
+    No foreign key: rollups of a bookmark deleted while another process
+    still buffers its visits must not fail the whole batch. Deletes remove
+    the rows they can see and retention clears any stragglers.
+    """
+    __tablename__ = "visit_hourly"
+    bookmark_id = db.Column(db.Integer, primary_key=True)
+    bucket = db.Column(db.DateTime, primary_key=True)
+    visits = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"VisitHourly>>> {self.bookmark_id} {self.bucket}"
+
+
+class VisitDaily(db.Model):
+    """Visits to a bookmark per UTC day, kept long after the hourly rows."""
+    __tablename__ = "visit_daily"
+    bookmark_id = db.Column(db.Integer, primary_key=True)
+    bucket = db.Column(db.Date, primary_key=True)
+    visits = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"VisitDaily>>> {self.bookmark_id} {self.bucket}"
+
+
+class ShortCodeSequence(db.Model):
+    """Single-row counter from which short URL code blocks are reserved."""
+    __tablename__ = "short_code_sequence"
+    id = db.Column(db.Integer, primary_key=True)
+    next_value = db.Column(db.BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"ShortCodeSequence>>> {self.next_value}"
@@ -0,0 +1,68 @@
+"""Database engine configuration.
+
+SQLite connections get WAL journaling, ``synchronous=NORMAL``, a busy
+timeout and larger page cache / mmap settings on connect, so readers no
+longer block behind visit-count writes. Server databases get explicit
+pool sizing, overflow, pre-ping and recycle settings instead.
+"""
+from sqlalchemy import event
+
+SQLITE_DEFAULTS = {
+    "SQLITE_JOURNAL_MODE": "WAL",
+    "SQLITE_SYNCHRONOUS": "NORMAL",
+    "SQLITE_BUSY_TIMEOUT": 5000,
+    "SQLITE_MMAP_SIZE": 256 * 1024 * 1024,
+    "SQLITE_CACHE_SIZE": -64 * 1024,
+}
+POOL_DEFAULTS = {
+    "DB_POOL_SIZE": 10,
+    "DB_MAX_OVERFLOW": 20,
+    "DB_POOL_PRE_PING": True,
+    "DB_POOL_RECYCLE": 1800,
+}
+
+
+def is_sqlite(uri):
+    """Return True if ``uri`` points at a SQLite database."""
+    return (uri or "").startswith("sqlite")
+
+
+def configure_engine_options(app):
+    """Derive ``SQLALCHEMY_ENGINE_OPTIONS``; call before ``db.init_app``."""
+    for key, value in {**SQLITE_DEFAULTS, **POOL_DEFAULTS}.items():
+        app.config.setdefault(key, value)
+
+    options = dict(app.config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+    if is_sqlite(app.config.get("SQLALCHEMY_DATABASE_URI")):
+        connect_args = dict(options.get("connect_args") or {})
+        connect_args.setdefault("timeout", app.config["SQLITE_BUSY_TIMEOUT"] / 1000)
+        options["connect_args"] = connect_args
+    else:
+        options.setdefault("pool_size", int(app.config["DB_POOL_SIZE"]))
+        options.setdefault("max_overflow", int(app.config["DB_MAX_OVERFLOW"]))
+        options.setdefault("pool_pre_ping", bool(app.config["DB_POOL_PRE_PING"]))
+        options.setdefault("pool_recycle", int(app.config["DB_POOL_RECYCLE"]))
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = options
+
+
+def install_sqlite_pragmas(config, engine):
+    """Apply the SQLite pragmas in ``config`` to new connections of ``engine``."""
+    if engine.dialect.name != "sqlite":
+        return
+    pragmas = (
+        ("journal_mode", config["SQLITE_JOURNAL_MODE"]),
+        ("synchronous", config["SQLITE_SYNCHRONOUS"]),
+        ("busy_timeout", int(config["SQLITE_BUSY_TIMEOUT"])),
+        ("mmap_size", int(config["SQLITE_MMAP_SIZE"])),
+        ("cache_size", int(config["SQLITE_CACHE_SIZE"])),
+    )
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, _connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                if value is not None:
+                    cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
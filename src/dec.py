@@ -1,19 +1,28 @@
-"""Timer decorator module."""
+"""Timer decorator module.
+
+For request timing in the running app see ``src.metrics``, which records
+per-endpoint latency histograms and serves them on ``/metrics``.
+"""
+import logging
 import time
 from datetime import datetime, timedelta
+from functools import wraps
+
+logger = logging.getLogger(__name__)
 
 
 def timer_dec(base_fn):
-    """Decorator that measures and prints function execution time."""
+    """Decorator that measures and logs function execution time."""
 
+    @wraps(base_fn)
     def enhanced_fn(*args, **kwargs):
         """Enhanced function that times the decorated function."""
-        start_time = time.time()
-        result = base_fn(*args, **kwargs)
-        end_time = time.time()
-        time.sleep(0.5)
-        print(f"Your Function to '{base_fn.__name__}' brewed in {end_time - start_time:.9f} seconds")
-        return result
+        start_time = time.perf_counter()
+        try:
+            return base_fn(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start_time
+            logger.info("Your Function to '%s' brewed in %.9f seconds", base_fn.__name__, elapsed)
 
     return enhanced_fn
 
@@ -32,6 +41,8 @@ def brew_matcha():
     print("Your Matcha is ready!")
     return print(f"Please drink your Matcha by {datetime.now() + timedelta(minutes=30)}.")
 
-brew_tea("Oolong", 1.25)
-brew_tea(tea_type="Green", steep_time=1)
-brew_matcha()
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    brew_tea("Oolong", 1.25)
+    brew_tea(tea_type="Green", steep_time=1)
+    brew_matcha()
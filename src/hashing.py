@@ -0,0 +1,125 @@
+"""Password hashing off the request thread.
+
+Hashes are computed in a bounded process pool so that bursts of
+``/register`` and ``/login`` requests cannot monopolise request workers.
+When more than ``PASSWORD_HASH_QUEUE_DEPTH`` hashes are already in flight,
+new requests are refused with ``HashingBusy`` instead of queueing without
+bound. ``PASSWORD_HASH_WORKERS = 0`` hashes inline on the calling thread.
+"""
+import os
+import threading
+
+from werkzeug.security import (
+    DEFAULT_PBKDF2_ITERATIONS,
+    check_password_hash,
+    generate_password_hash,
+)
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing queue is full."""
+
+
+def canonical_method(method):
+    """Return ``method`` with werkzeug's implicit defaults spelled out."""
+    name, *args = method.split(":")
+    if name == "pbkdf2":
+        hash_name = args[0] if args else "sha256"
+        iterations = args[1] if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f"pbkdf2:{hash_name}:{iterations}"
+    if name == "scrypt" and not args:
+        return "scrypt:32768:8:1"
+    return method
+
+
+class PasswordHasher:
+    """Hash and verify passwords in a bounded process pool."""
+
+    def __init__(self):
+        self.method = "pbkdf2:sha256"
+        self.workers = 2
+        self.queue_depth = 64
+        self.timeout = 30.0
+        self._canonical = canonical_method(self.method)
+        self._slots = threading.BoundedSemaphore(self.queue_depth)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def init_app(self, app):
+        """Configure cost and pool sizing from the Flask app config."""
+        app.config.setdefault("PASSWORD_HASH_METHOD", "pbkdf2:sha256")
+        app.config.setdefault("PASSWORD_HASH_WORKERS", 2)
+        app.config.setdefault("PASSWORD_HASH_QUEUE_DEPTH", 64)
+        app.config.setdefault("PASSWORD_HASH_TIMEOUT", 30.0)
+        with self._lock:
+            self.method = app.config["PASSWORD_HASH_METHOD"]
+            self._canonical = canonical_method(self.method)
+            self.workers = int(app.config["PASSWORD_HASH_WORKERS"])
+            self.queue_depth = int(app.config["PASSWORD_HASH_QUEUE_DEPTH"])
+            self.timeout = float(app.config["PASSWORD_HASH_TIMEOUT"])
+            self._slots = threading.BoundedSemaphore(self.queue_depth)
+            self._shutdown()
+
+    def hash(self, password):
+        """Return a hash of ``password`` using the configured method."""
+        return self._run(generate_password_hash, password, method=self.method)
+
+    def verify(self, pwhash, password):
+        """Return True if ``password`` matches ``pwhash``."""
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        """Return True if ``pwhash`` was made with a different method or cost."""
+        return pwhash.split("$", 1)[0] != self._canonical
+
+    def stats(self):
+        """Return pool sizing and rejection counters."""
+        return {
+            "method": self._canonical,
+            "workers": self.workers,
+            "queue_depth": self.queue_depth,
+            "rejected": self.rejected,
+        }
+
+    def _run(self, func, *args, **kwargs):
+        """Run ``func`` in the pool, refusing work when the queue is full."""
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise HashingBusy("Too many password hashes in flight.")
+        try:
+            executor = self._get_executor()
+            if executor is None:
+                return func(*args, **kwargs)
+            return executor.submit(func, *args, **kwargs).result(timeout=self.timeout)
+        finally:
+            self._slots.release()
+
+    def _get_executor(self):
+        """Return this process's pool, creating it after start-up or a fork."""
+        if self.workers <= 0:
+            return None
+        if self._executor is not None and self._pid == os.getpid():
+            return self._executor
+        # Only loaded by processes that hash in a pool.
+        import multiprocessing  # pylint: disable=import-outside-toplevel
+        from concurrent.futures import ProcessPoolExecutor  # pylint: disable=import-outside-toplevel
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+                self._pid = os.getpid()
+            return self._executor
+
+    def _shutdown(self):
+        """Stop the pool owned by this process, if any."""
+        if self._executor is not None and self._pid == os.getpid():
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+        self._pid = None
+
+
+password_hasher = PasswordHasher()
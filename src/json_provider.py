@@ -0,0 +1,65 @@
+"""Optional orjson-backed JSON provider for the Flask app.
+
+orjson is not a hard dependency: when it is not installed, or
+``JSON_PROVIDER`` is set to ``"default"``, Flask's standard provider stays
+in place. Output matches the default provider (sorted keys, HTTP dates)
+apart from insignificant whitespace and non-ASCII escaping.
+"""
+from datetime import datetime, timezone
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+MONTHS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun",
+          "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider that encodes with orjson."""
+
+    option = orjson.OPT_SORT_KEYS | orjson.OPT_PASSTHROUGH_DATETIME if orjson else 0
+
+    @staticmethod
+    def default(o):
+        """Encode datetimes as HTTP dates without going through email.utils."""
+        if isinstance(o, datetime):
+            if o.tzinfo is not None:
+                o = o.astimezone(timezone.utc)
+            return (
+                f"{WEEKDAYS[o.weekday()]}, {o.day:02d} {MONTHS[o.month - 1]} "
+                f"{o.year:04d} {o.hour:02d}:{o.minute:02d}:{o.second:02d} GMT"
+            )
+        return DefaultJSONProvider.default(o)
+
+    def dumps(self, obj, **kwargs):
+        """Serialize ``obj`` with orjson unless stdlib-only options are given."""
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self.option).decode()
+
+    def loads(self, s, **kwargs):
+        """Deserialize ``s`` with orjson."""
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        """Return a JSON response, pretty-printed only in debug mode."""
+        obj = self._prepare_response_obj(args, kwargs)
+        option = self.option
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            option |= orjson.OPT_INDENT_2
+        body = orjson.dumps(obj, default=self.default, option=option | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def init_json_provider(app):
+    """Install the fastest available JSON provider on ``app``."""
+    app.config.setdefault("JSON_PROVIDER", "auto")
+    if orjson is not None and app.config["JSON_PROVIDER"] != "default":
+        app.json = OrjsonProvider(app)
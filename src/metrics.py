@@ -0,0 +1,194 @@
+"""Per-request instrumentation exposed in Prometheus text format.
+
+Every request is timed into a latency histogram labelled by endpoint,
+method and status. SQLAlchemy cursor events count the statements each
+request runs and the time spent in them. An in-flight gauge tracks
+concurrent requests. Requests slower than ``SLOW_REQUEST_THRESHOLD``
+seconds are logged together with the SQL they ran.
+"""
+import bisect
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+
+from src.analytics import visit_analytics
+from src.bloom import bookmark_filter
+from src.cache import redirect_cache
+from src.compress import response_compressor
+from src.database import db
+from src.hashing import password_hasher
+from src.replicas import read_router
+from src.visits import visit_counter
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+
+class Histogram:
+    """Fixed-bucket histogram keyed by a tuple of label values."""
+
+    def __init__(self, name, documentation, label_names, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = defaultdict(lambda: [[0] * (len(buckets) + 1), 0.0, 0])
+
+    def observe(self, labels, value):
+        """Record ``value`` for ``labels``; caller holds the registry lock."""
+        series = self._series[labels]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self):
+        """Yield exposition lines for every series."""
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, (counts, total, count) in sorted(self._series.items()):
+            label_text = _labels(self.label_names, labels)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield f'{self.name}_bucket{{{label_text},le="{bound}"}} {cumulative}'
+            yield f'{self.name}_bucket{{{label_text},le="+Inf"}} {count}'
+            yield f"{self.name}_sum{{{label_text}}} {total}"
+            yield f"{self.name}_count{{{label_text}}} {count}"
+
+
+class RequestMetrics:
+    """Collect request, SQL and in-flight metrics for a Flask app."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.slow_threshold = None
+        self.latency = Histogram(
+            "http_request_duration_seconds", "Request latency.",
+            ("endpoint", "method", "status"), LATENCY_BUCKETS,
+        )
+        self.sql_statements = Histogram(
+            "http_request_sql_statements", "SQL statements executed per request.",
+            ("endpoint",), STATEMENT_BUCKETS,
+        )
+        self.sql_duration = Histogram(
+            "http_request_sql_duration_seconds", "Time spent in SQL per request.",
+            ("endpoint",), LATENCY_BUCKETS,
+        )
+
+    def init_app(self, app):
+        """Install request hooks, SQL listeners and the /metrics route."""
+        app.config.setdefault("SLOW_REQUEST_THRESHOLD", None)
+        threshold = app.config["SLOW_REQUEST_THRESHOLD"]
+        self.slow_threshold = float(threshold) if threshold else None
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+        # Every bind, so statements routed to a read replica are counted too.
+        with app.app_context():
+            for engine in db.engines.values():
+                event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+                event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+        app.add_url_rule("/metrics", "metrics", self.metrics_view, methods=["GET"])
+
+    def metrics_view(self):
+        """Serve all metrics in Prometheus text exposition format."""
+        return Response(self.render(), mimetype="text/plain; version=0.0.4")
+
+    def render(self):
+        """Return the exposition text for every metric."""
+        with self._lock:
+            lines = [
+                "# HELP http_requests_in_flight Requests currently being served.",
+                "# TYPE http_requests_in_flight gauge",
+                f"http_requests_in_flight {self.in_flight}",
+            ]
+            for histogram in (self.latency, self.sql_statements, self.sql_duration):
+                lines.extend(histogram.render())
+
+        for prefix, stats in (
+            ("redirect_cache", redirect_cache.stats()),
+            ("visit_counter", visit_counter.stats()),
+            ("visit_analytics", visit_analytics.stats()),
+            ("password_hasher", password_hasher.stats()),
+            ("read_router", read_router.stats()),
+            ("bookmark_filter", bookmark_filter.stats()),
+            ("response_compressor", response_compressor.stats()),
+        ):
+            for key, value in sorted(stats.items()):
+                if isinstance(value, (bool, int, float)):
+                    lines.append(f"# TYPE {prefix}_{key} gauge")
+                    lines.append(f"{prefix}_{key} {float(value)}")
+        return "\n".join(lines) + "\n"
+
+    def _before_request(self):
+        g.metrics_start = time.perf_counter()
+        g.sql_count = 0
+        g.sql_time = 0.0
+        g.sql_log = [] if self.slow_threshold is not None else None
+        with self._lock:
+            self.in_flight += 1
+
+    def _after_request(self, response):
+        start = g.get("metrics_start")
+        if start is None:
+            return response
+        elapsed = time.perf_counter() - start
+        endpoint = request.endpoint or "unmatched"
+        with self._lock:
+            self.latency.observe((endpoint, request.method, str(response.status_code)), elapsed)
+            self.sql_statements.observe((endpoint,), g.sql_count)
+            self.sql_duration.observe((endpoint,), g.sql_time)
+
+        if self.slow_threshold is not None and elapsed >= self.slow_threshold:
+            logger.warning(
+                "Slow request %s %s -> %s took %.3fs with %d SQL statements (%.3fs):\n%s",
+                request.method, request.full_path, response.status_code, elapsed,
+                g.sql_count, g.sql_time,
+                "\n".join(f"  [{duration * 1000:.2f}ms] {statement}"
+                          for statement, duration in g.sql_log),
+            )
+        return response
+
+    def _teardown_request(self, _exc):
+        if g.pop("metrics_start", None) is not None:
+            with self._lock:
+                self.in_flight -= 1
+
+    @staticmethod
+    def _before_cursor_execute(_conn, _cursor, _statement, _parameters, context, _many):
+        context.metrics_start = time.perf_counter()
+
+    @staticmethod
+    def _after_cursor_execute(_conn, _cursor, statement, _parameters, context, _many):
+        if not has_request_context() or "sql_count" not in g:
+            return
+        duration = time.perf_counter() - context.metrics_start
+        g.sql_count += 1
+        g.sql_time += duration
+        if g.sql_log is not None:
+            g.sql_log.append((statement, duration))
+
+
+def _labels(names, values):
+    """Format escaped label pairs for the exposition format."""
+    return ",".join(
+        f'{name}="{_escape(value)}"' for name, value in zip(names, values)
+    )
+
+
+def _escape(value):
+    """Escape a label value per the Prometheus text format."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+request_metrics = RequestMetrics()
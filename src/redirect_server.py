@@ -0,0 +1,418 @@
+"""Standalone asyncio/ASGI server for short URL redirects.
+
+Serves only ``GET /<short_url>`` against the same database as the Flask
+app, without blueprints, JWT or the Flask-SQLAlchemy session. Each process
+keeps its own ``RedirectCache`` and buffers visits in memory, writing them
+to ``Bookmark.visits`` and the analytics rollups with the same statements
+as the Flask app's buffers (so ETags, stats and timeseries stay
+consistent). Queries use SQLAlchemy's asyncio engine when the async driver
+for the database is installed (``asyncpg`` or ``aiomysql``) and run the
+sync engine on a worker thread otherwise, which is also the fast path for
+SQLite.
+
+Run it under any ASGI server::
+
+    uvicorn src.redirect_server:app --workers 4
+
+or with the built-in HTTP/1.1 server, which forks ``--workers`` processes
+sharing the port through ``SO_REUSEPORT``::
+
+    python -m src.redirect_server --port 8001 --workers 4
+
+The built-in server never reads request bodies: a request that is not a
+GET or HEAD, or that declares a body, is answered and its connection
+closed. Put it behind a proxy or use an ASGI server for anything more.
+
+Configuration comes from the same environment variables as the Flask app:
+``SQLALCHEMY_DATABASE_URI``, ``REDIRECT_CACHE_SIZE``, ``REDIRECT_CACHE_TTL``,
+``VISIT_FLUSH_INTERVAL``, ``VISIT_FLUSH_THRESHOLD`` and the ``SQLITE_*``
+settings.
+"""
+import argparse
+import asyncio
+import importlib.util
+import json
+import logging
+import os
+import signal
+import socket
+import time
+from collections import Counter
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from werkzeug.urls import iri_to_uri
+
+from src.analytics import HOUR, write_rollups
+from src.cache import RedirectCache
+from src.database import Bookmark
+from src.db_config import SQLITE_DEFAULTS, install_sqlite_pragmas
+from src.visits import write_visits
+
+logger = logging.getLogger(__name__)
+
+# Async driver (and the module it needs) for each sync dialect. SQLite is
+# left out on purpose: aiosqlite hops threads for every cursor call and
+# measured ~5x slower per lookup than the sync driver on a worker thread.
+# An explicit ``sqlite+aiosqlite://`` URI is still honoured.
+ASYNC_DRIVERS = {
+    "postgresql": ("asyncpg", "asyncpg"),
+    "mysql": ("aiomysql", "aiomysql"),
+}
+
+NOT_FOUND_BODY = json.dumps({"error": "Short URL not found."}).encode()
+REDIRECT_BODY = b"Redirecting..."
+
+
+def config_from_env(environ=None):
+    """Return the server configuration read from ``environ``."""
+    environ = os.environ if environ is None else environ
+    config = {
+        "SQLALCHEMY_DATABASE_URI": environ.get("SQLALCHEMY_DATABASE_URI"),
+        "REDIRECT_CACHE_SIZE": int(environ.get("REDIRECT_CACHE_SIZE", 10000)),
+        "REDIRECT_CACHE_TTL": float(environ.get("REDIRECT_CACHE_TTL", 300)),
+        "VISIT_FLUSH_INTERVAL": float(environ.get("VISIT_FLUSH_INTERVAL", 5)),
+        "VISIT_FLUSH_THRESHOLD": int(environ.get("VISIT_FLUSH_THRESHOLD", 1000)),
+    }
+    for key, default in SQLITE_DEFAULTS.items():
+        config[key] = type(default)(environ.get(key, default))
+    return config
+
+
+def async_url(uri):
+    """Return ``uri`` rewritten for an installed async driver, or None."""
+    url = make_url(uri)
+    if url.get_dialect().is_async:
+        return url
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None or importlib.util.find_spec(driver[1]) is None:
+        return None
+    return url.set(drivername=f"{url.get_backend_name()}+{driver[0]}")
+
+
+def _lookup(conn, short_url):
+    """Return ``(id, url)`` for ``short_url`` or None."""
+    row = conn.execute(
+        select(Bookmark.id, Bookmark.url)
+        .where(Bookmark.short_url == short_url)
+    ).first()
+    return None if row is None else tuple(row)
+
+
+def _write(conn, visits, events):
+    """Write visit counters and analytics rollups in one transaction."""
+    write_visits(conn, visits)
+    write_rollups(conn, events)
+
+
+class Database:
+    """Run sync callables on a connection, without blocking the event loop."""
+
+    def __init__(self, config):
+        uri = config["SQLALCHEMY_DATABASE_URI"]
+        if not uri:
+            raise RuntimeError("SQLALCHEMY_DATABASE_URI is not set.")
+        url = async_url(uri)
+        connect_args = {}
+        if make_url(uri).get_backend_name() == "sqlite":
+            connect_args["timeout"] = config["SQLITE_BUSY_TIMEOUT"] / 1000
+        if url is not None:
+            self.engine = create_async_engine(url, connect_args=connect_args)
+            self.sync_engine = self.engine.sync_engine
+            self.is_async = True
+        else:
+            logger.info("No async driver for %s; using a thread pool.", make_url(uri).drivername)
+            self.engine = create_engine(uri, connect_args=connect_args)
+            self.sync_engine = self.engine
+            self.is_async = False
+        install_sqlite_pragmas(config, self.sync_engine)
+
+    async def run(self, func, *args, write=False):
+        """Return ``func(conn, *args)``, in a transaction when ``write``."""
+        if self.is_async:
+            context = self.engine.begin() if write else self.engine.connect()
+            async with context as conn:
+                return await conn.run_sync(func, *args)
+        return await asyncio.to_thread(self._run_sync, func, args, write)
+
+    def _run_sync(self, func, args, write):
+        context = self.engine.begin() if write else self.engine.connect()
+        with context as conn:
+            return func(conn, *args)
+
+    async def dispose(self):
+        """Close all pooled connections."""
+        if self.is_async:
+            await self.engine.dispose()
+        else:
+            self.engine.dispose()
+
+
+class RedirectApp:
+    """ASGI application answering ``/<short_url>`` with a 302."""
+
+    def __init__(self, config=None):
+        self.config = config_from_env() if config is None else config
+        self.cache = RedirectCache(
+            maxsize=int(self.config["REDIRECT_CACHE_SIZE"]),
+            ttl=float(self.config["REDIRECT_CACHE_TTL"]),
+        )
+        self.flush_interval = float(self.config["VISIT_FLUSH_INTERVAL"])
+        self.flush_threshold = int(self.config["VISIT_FLUSH_THRESHOLD"])
+        self.db = None
+        self.async_driver = None
+        self._pending = Counter()
+        self._events = Counter()
+        self._flusher = None
+        self._wake = None
+        self.flushes = 0
+        self.flushed_visits = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._handle(scope, send)
+
+    async def startup(self):
+        """Open the database and start the visit flusher."""
+        if self.db is None:
+            self.db = Database(self.config)
+            self.async_driver = self.db.is_async
+        if self._flusher is None:
+            self._wake = asyncio.Event()
+            self._flusher = asyncio.create_task(self._run_flusher())
+
+    async def shutdown(self):
+        """Stop the flusher, write pending visits and close the database."""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        if self.db is not None:
+            await self.flush()
+            await self.db.dispose()
+            self.db = None
+
+    async def resolve(self, short_url):
+        """Return ``(id, url)`` for ``short_url``, using the cache."""
+        entry = self.cache.get(short_url)
+        if entry is None:
+            entry = await self.db.run(_lookup, short_url)
+            if entry is not None:
+                self.cache.set(short_url, entry)
+        return entry
+
+    def record(self, short_url, bookmark_id):
+        """Buffer one visit to ``short_url``."""
+        self._pending[short_url] += 1
+        self._events[(bookmark_id, int(time.time()) // HOUR)] += 1
+        if len(self._pending) >= self.flush_threshold:
+            self._wake.set()
+
+    async def flush(self):
+        """Write buffered visits; re-queue them if the write fails."""
+        if not self._pending:
+            return 0
+        batch, self._pending = self._pending, Counter()
+        events, self._events = self._events, Counter()
+        try:
+            await self.db.run(_write, batch, events, write=True)
+        except Exception:  # pylint: disable=broad-exception-caught
+            logger.exception("Visit flush failed; re-queueing %d codes", len(batch))
+            self._pending.update(batch)
+            self._events.update(events)
+            return 0
+        self.flushes += 1
+        self.flushed_visits += sum(batch.values())
+        return len(batch)
+
+    def stats(self):
+        """Return cache and visit buffer counters."""
+        return {
+            "redirect_cache": self.cache.stats(),
+            "pending_codes": len(self._pending),
+            "flushes": self.flushes,
+            "flushed_visits": self.flushed_visits,
+            "async_driver": self.async_driver,
+        }
+
+    async def _handle(self, scope, send):
+        if self._flusher is None:
+            # The server may not speak the lifespan protocol.
+            await self.startup()
+
+        short_url = scope["path"][1:]
+        if scope["method"] not in ("GET", "HEAD"):
+            await _respond(send, 405, [(b"allow", b"GET, HEAD")], b"")
+            return
+        entry = await self.resolve(short_url) if short_url and "/" not in short_url else None
+        if entry is None:
+            await _respond(send, 404, [(b"content-type", b"application/json")], NOT_FOUND_BODY)
+            return
+
+        bookmark_id, url = entry
+        self.record(short_url, bookmark_id)
+        location = iri_to_uri(url).encode("latin-1")
+        body = b"" if scope["method"] == "HEAD" else REDIRECT_BODY
+        await _respond(send, 302, [(b"location", location),
+                                   (b"content-type", b"text/plain")], body)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self.startup()
+                except Exception as exc:  # pylint: disable=broad-exception-caught
+                    await send({"type": "lifespan.startup.failed", "message": str(exc)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _run_flusher(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+
+async def _respond(send, status, headers, body):
+    """Send a complete response with a Content-Length header."""
+    headers = headers + [(b"content-length", str(len(body)).encode())]
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+REASONS = {302: b"Found", 404: b"Not Found", 405: b"Method Not Allowed",
+           400: b"Bad Request"}
+
+
+def _has_body(headers):
+    """Return True unless ``headers`` rule out a request body."""
+    for name, value in headers:
+        if name == b"transfer-encoding":
+            return True
+        if name == b"content-length" and value != b"0":
+            return True
+    return False
+
+
+async def _serve_connection(application, reader, writer):
+    """Serve HTTP/1.1 requests from one keep-alive connection.
+
+    Only bodiless GET and HEAD requests keep the connection open; any
+    other request is answered and the connection closed unread.
+    """
+    try:
+        while True:
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                return
+            request_line, *header_lines = head[:-4].split(b"\r\n")
+            try:
+                method, target, version = request_line.decode("latin-1").split(" ")
+            except ValueError:
+                writer.write(b"HTTP/1.1 400 Bad Request\r\nconnection: close\r\n"
+                             b"content-length: 0\r\n\r\n")
+                return
+            headers = []
+            for line in header_lines:
+                name, _, value = line.partition(b":")
+                headers.append((name.strip().lower(), value.strip()))
+            connection = dict(headers).get(b"connection", b"").lower()
+            keep_alive = (connection != b"close" if version == "HTTP/1.1"
+                          else connection == b"keep-alive")
+            if method not in ("GET", "HEAD") or _has_body(headers):
+                # Request bodies are never read, so whatever follows the
+                # head cannot be trusted as the next request.
+                keep_alive = False
+
+            path, _, query = target.partition("?")
+            scope = {
+                "type": "http", "asgi": {"version": "3.0"}, "http_version": version[5:],
+                "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+                "query_string": query.encode(), "root_path": "", "headers": headers,
+            }
+            response = []
+
+            async def receive():
+                return {"type": "http.request", "body": b"", "more_body": False}
+
+            async def send(message):
+                response.append(message)
+
+            await application(scope, receive, send)
+            start, body = response[0], b"".join(m.get("body", b"") for m in response[1:])
+            status = start["status"]
+            lines = [b"HTTP/1.1 %d %s" % (status, REASONS.get(status, b""))]
+            lines += [name + b": " + value for name, value in start["headers"]]
+            lines.append(b"connection: " + (b"keep-alive" if keep_alive else b"close"))
+            writer.write(b"\r\n".join(lines) + b"\r\n\r\n" + body)
+            await writer.drain()
+            if not keep_alive:
+                return
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(application, host, port):
+    """Run ``application`` on ``host:port`` until SIGINT or SIGTERM."""
+    await application.startup()
+    server = await asyncio.start_server(
+        lambda r, w: _serve_connection(application, r, w),
+        host, port, reuse_port=hasattr(socket, "SO_REUSEPORT"),
+    )
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    async with server:
+        await stop.wait()
+    await application.shutdown()
+
+
+def main():
+    """Serve redirects from ``--workers`` processes sharing one port."""
+    parser = argparse.ArgumentParser(description="Serve short URL redirects.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    children = []
+    for _ in range(max(args.workers, 1) - 1):
+        pid = os.fork()
+        if pid == 0:
+            children = None
+            break
+        children.append(pid)
+
+    try:
+        asyncio.run(serve(RedirectApp(), args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for pid in children or ():
+            os.kill(pid, signal.SIGTERM)
+            os.waitpid(pid, 0)
+
+
+app = RedirectApp()
+
+if __name__ == "__main__":
+    main()
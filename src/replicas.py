@@ -0,0 +1,131 @@
+"""Routing of read-only queries to an optional read replica.
+
+When ``READ_REPLICA_URI`` is set it is registered as the ``replica``
+SQLAlchemy bind, and read-only endpoints execute their queries with
+``read_router.bind_arguments(user_id)``. Writes always use the primary.
+A user who wrote within the last ``READ_YOUR_WRITES_SECONDS`` keeps
+reading from the primary, so they never see the replica lag behind
+their own changes.
+
+The worker that served the write remembers it in memory. So that the
+next request can land on any worker, or any node, the write response
+also sets the ``READ_YOUR_WRITES_COOKIE`` cookie, signed with
+``SECRET_KEY`` and valid for the window; a request carrying it for its
+own user reads from the primary. Clients that drop cookies only get the
+in-memory pin of whichever worker served the write, which is best-effort.
+"""
+import math
+import threading
+import time
+
+from flask import has_request_context, request
+from flask_jwt_extended import get_jwt_identity
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+from src.constants.http_status_codes import is_success
+from src.database import db
+
+REPLICA_BIND = "replica"
+WRITE_METHODS = frozenset(("POST", "PUT", "PATCH", "DELETE"))
+
+
+class ReadRouter:
+    """Choose the primary or the replica engine for read queries."""
+
+    def __init__(self):
+        self.window = 5.0
+        self.enabled = False
+        self.max_tracked = 100000
+        self.cookie_name = "read_your_writes"
+        self._recent_writes = {}
+        self._signer = None
+        self._lock = threading.Lock()
+        self.replica_reads = 0
+        self.primary_reads = 0
+
+    def init_app(self, app):
+        """Register the replica bind; call before ``db.init_app``."""
+        app.config.setdefault("READ_REPLICA_URI", None)
+        app.config.setdefault("READ_YOUR_WRITES_SECONDS", 5.0)
+        app.config.setdefault("READ_YOUR_WRITES_COOKIE", "read_your_writes")
+        self.window = float(app.config["READ_YOUR_WRITES_SECONDS"])
+        self.enabled = bool(app.config["READ_REPLICA_URI"])
+        self.cookie_name = app.config["READ_YOUR_WRITES_COOKIE"]
+        secret = app.config.get("SECRET_KEY")
+        self._signer = (
+            URLSafeTimedSerializer(secret, salt="read-your-writes") if secret else None
+        )
+        with self._lock:
+            self._recent_writes.clear()
+        self.replica_reads = 0
+        self.primary_reads = 0
+        if self.enabled:
+            binds = dict(app.config.get("SQLALCHEMY_BINDS") or {})
+            binds.setdefault(REPLICA_BIND, app.config["READ_REPLICA_URI"])
+            app.config["SQLALCHEMY_BINDS"] = binds
+            app.after_request(self._track_writes)
+
+    def bind_arguments(self, user_id=None):
+        """Return ``bind_arguments`` routing a read for ``user_id``."""
+        if not self.enabled or (user_id is not None and self.wrote_recently(user_id)):
+            self.primary_reads += 1
+            return {}
+        self.replica_reads += 1
+        return {"bind": db.engines[REPLICA_BIND]}
+
+    def record_write(self, user_id):
+        """Pin ``user_id`` to the primary for the read-your-writes window."""
+        now = time.monotonic()
+        with self._lock:
+            self._recent_writes[str(user_id)] = now + self.window
+            if len(self._recent_writes) > self.max_tracked:
+                self._recent_writes = {
+                    key: until for key, until in self._recent_writes.items() if until > now
+                }
+
+    def wrote_recently(self, user_id):
+        """Return True if ``user_id`` wrote within the window.
+
+        Checks this process's own record, then the request's pin cookie.
+        """
+        until = self._recent_writes.get(str(user_id))
+        if until is not None and until > time.monotonic():
+            return True
+        if self._signer is None or not has_request_context():
+            return False
+        token = request.cookies.get(self.cookie_name)
+        if not token:
+            return False
+        try:
+            return self._signer.loads(token, max_age=self.window) == str(user_id)
+        except BadSignature:
+            return False
+
+    def stats(self):
+        """Return read routing counters."""
+        return {
+            "enabled": self.enabled,
+            "replica_reads": self.replica_reads,
+            "primary_reads": self.primary_reads,
+            "pinned_users": len(self._recent_writes),
+        }
+
+    def _track_writes(self, response):
+        """Record successful authenticated writes for read-your-writes."""
+        if request.method in WRITE_METHODS and is_success(response.status_code):
+            try:
+                user_id = get_jwt_identity()
+            except RuntimeError:
+                user_id = None
+            if user_id is not None:
+                self.record_write(user_id)
+                if self._signer is not None:
+                    response.set_cookie(
+                        self.cookie_name, self._signer.dumps(str(user_id)),
+                        max_age=math.ceil(self.window), secure=request.is_secure,
+                        httponly=True, samesite="Strict",
+                    )
+        return response
+
+
+read_router = ReadRouter()
@@ -0,0 +1,229 @@
+"""Full-text search over bookmark URLs and bodies.
+
+On SQLite the index is an FTS5 external-content table, ``bookmark_fts``,
+over ``bookmark.url``, ``body`` and an ``owner`` token (``u<user_id>``)
+read through the ``bookmark_fts_source`` view, kept in sync by triggers
+on insert, update and delete. Results are ranked by ``bm25`` with the
+owner column weighted zero. ``search_plan`` picks one of two plans:
+
+* terms with at most ``SEARCH_MAX_CANDIDATES`` matches in the whole index
+  are matched alone and filtered on the joined ``bookmark.user_id``, which
+  is cheapest for rare terms since ranking never touches the owner token;
+* more common terms also MATCH the owner token, so FTS5 intersects the
+  term doclists with the user's own, and only the user's newest
+  ``SEARCH_MAX_CANDIDATES`` matches are ranked.
+
+Either way a search costs in proportion to ``SEARCH_MAX_CANDIDATES`` and
+the user's own matches, not to how often a term occurs across all users.
+Other databases fall back to ``LIKE`` matching.
+"""
+import logging
+import re
+
+from sqlalchemy import (
+    Column, Integer, MetaData, Table, and_, func, literal_column, or_, select
+)
+from sqlalchemy.exc import OperationalError
+
+from src.database import Bookmark
+from src.serializers import BOOKMARK_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "bookmark_fts"
+FTS_SOURCE = "bookmark_fts_source"
+FTS_COLUMNS = ("url", "body", "owner")
+FTS_TRIGGERS = (f"{FTS_TABLE}_ai", f"{FTS_TABLE}_ad", f"{FTS_TABLE}_au")
+
+# Kept out of db.metadata so create_all() never tries to manage it.
+fts = Table(FTS_TABLE, MetaData(), Column("rowid", Integer, primary_key=True))
+
+FTS_DDL = (
+    f"CREATE VIEW IF NOT EXISTS {FTS_SOURCE} AS "
+    "SELECT id, url, body, 'u' || user_id AS owner FROM bookmark",
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"url, body, owner, content='{FTS_SOURCE}', content_rowid='id', prefix='2 3')",
+    # Owner tokens only select rows; they must not change the ranking.
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) VALUES ('rank', 'bm25(1.0, 1.0, 0.0)')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON bookmark BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, url, body, owner) "
+    "VALUES (new.id, new.url, new.body, 'u' || new.user_id); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON bookmark BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, url, body, owner) "
+    "VALUES ('delete', old.id, old.url, old.body, 'u' || old.user_id); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF url, body, user_id "
+    f"ON bookmark BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, url, body, owner) "
+    "VALUES ('delete', old.id, old.url, old.body, 'u' || old.user_id); "
+    f"INSERT INTO {FTS_TABLE}(rowid, url, body, owner) "
+    "VALUES (new.id, new.url, new.body, 'u' || new.user_id); END",
+)
+
+# Same token boundaries as FTS5's unicode61 tokenizer: runs of letters and
+# digits, with an optional trailing ``*`` for prefix matches.
+TERM_RE = re.compile(r"([^\W_]+)(\*?)")
+
+
+def _fts_columns(conn):
+    """Return the column names of the FTS5 table, empty if there is none."""
+    return tuple(row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({FTS_TABLE})"))
+
+
+def fts_available(engine):
+    """Return True if ``engine`` has the FTS5 search table with owner tokens."""
+    if engine.dialect.name != "sqlite":
+        return False
+    with engine.connect() as conn:
+        return _fts_columns(conn) == FTS_COLUMNS
+
+
+def fts_enabled(app, engine):
+    """Return whether searches on ``app`` use FTS5, checking ``engine`` once."""
+    state = app.extensions.setdefault("bookmark_search", {})
+    if "fts" not in state:
+        state["fts"] = fts_available(engine)
+    return state["fts"]
+
+
+def install_search_index(engine):
+    """Create the FTS5 table and its triggers on SQLite if they are missing.
+
+    An index from before owner tokens is replaced and rebuilt in place. A
+    table created on a database that already has bookmarks starts empty;
+    ``flask upgrade-db`` or ``flask rebuild-search-index`` indexes them.
+    On a SQLite build without FTS5 nothing changes and searches keep using
+    ``LIKE``.
+    """
+    if engine.dialect.name != "sqlite" or fts_available(engine):
+        return
+    try:
+        with engine.begin() as conn:
+            replaced = bool(_fts_columns(conn))
+            if replaced:
+                for trigger in FTS_TRIGGERS:
+                    conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {trigger}")
+                conn.exec_driver_sql(f"DROP TABLE {FTS_TABLE}")
+                conn.exec_driver_sql(f"DROP VIEW IF EXISTS {FTS_SOURCE}")
+            for statement in FTS_DDL:
+                conn.exec_driver_sql(statement)
+    except OperationalError:
+        logger.warning("Could not create %s; searches use LIKE matching.",
+                       FTS_TABLE, exc_info=True)
+        return
+    if replaced:
+        logger.info("Replaced %s without owner tokens; re-indexed %d bookmarks.",
+                    FTS_TABLE, rebuild_search_index(engine))
+    elif needs_rebuild(engine):
+        logger.warning("Created %s on a populated database; run "
+                       "'flask rebuild-search-index' to index existing bookmarks.", FTS_TABLE)
+
+
+def needs_rebuild(engine):
+    """Return True if bookmarks exist but the search index is empty."""
+    if not fts_available(engine):
+        return False
+    with engine.connect() as conn:
+        indexed = conn.exec_driver_sql(f"SELECT 1 FROM {FTS_TABLE}_docsize LIMIT 1").first()
+        return indexed is None and conn.scalar(select(Bookmark.id).limit(1)) is not None
+
+
+def rebuild_search_index(engine):
+    """Re-index every bookmark from the content table; return the row count."""
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        return conn.scalar(select(func.count()).select_from(Bookmark))
+
+
+def search_terms(query):
+    """Split ``query`` into ``(term, is_prefix)`` pairs."""
+    return [(term, bool(star)) for term, star in TERM_RE.findall(query or "")]
+
+
+def match_expression(terms, user_id=None):
+    """Return the FTS5 MATCH string requiring every one of ``terms``.
+
+    With ``user_id`` the string also requires that user's owner token.
+    Every term is quoted, so user input can never be parsed as FTS5 query
+    syntax.
+    """
+    phrases = " ".join(f'"{term}"' + ("*" if prefix else "") for term, prefix in terms)
+    owner = "" if user_id is None else f'owner : "u{int(user_id)}" AND '
+    return f"{owner}{{url body}} : ({phrases})"
+
+
+def _match(terms, user_id=None):
+    return literal_column(FTS_TABLE).op("MATCH")(match_expression(terms, user_id))
+
+
+def _nth_newest_match(terms, user_id, n):
+    """Return a select of the rowid of the ``n``-th newest match, if there is one.
+
+    FTS5 walks the doclists in rowid order without ranking, so this costs
+    O(n) however common the terms are.
+    """
+    return (
+        select(fts.c.rowid)
+        .where(_match(terms, user_id))
+        .order_by(fts.c.rowid.desc())
+        .offset(n - 1)
+        .limit(1)
+    )
+
+
+def search_plan(scalar, user_id, terms, max_candidates):
+    """Return ``(by_owner, floor)`` for an FTS search of ``terms``.
+
+    ``scalar`` runs a select and returns its first column. ``by_owner`` is
+    True when ``terms`` have more than ``max_candidates`` matches across
+    all users; ``floor`` is then the lowest rowid among the user's newest
+    ``max_candidates`` matches, or None if the user has no more than that.
+    """
+    if scalar(_nth_newest_match(terms, None, max_candidates + 1)) is None:
+        return False, None
+    return True, scalar(_nth_newest_match(terms, user_id, max_candidates))
+
+
+def search_query(user_id, terms, use_fts, by_owner=False, floor=None):
+    """Return a ranked select of ``BOOKMARK_COLUMNS`` matching ``terms``.
+
+    ``by_owner`` and ``floor`` come from ``search_plan``.
+    """
+    if use_fts:
+        if by_owner:
+            # The owner token selects the user's rows; filtering on
+            # bookmark.user_id as well would make SQLite drive the join
+            # from the user's rows and probe FTS5 once per bookmark.
+            condition = _match(terms, user_id)
+            if floor is not None:
+                condition = and_(condition, fts.c.rowid >= floor)
+        else:
+            condition = and_(_match(terms), Bookmark.user_id == user_id)
+        return (
+            select(*BOOKMARK_COLUMNS)
+            .join_from(fts, Bookmark, Bookmark.id == fts.c.rowid)
+            .where(condition)
+            .order_by(literal_column(f"{FTS_TABLE}.rank"))
+        )
+    conditions = []
+    for term, _ in terms:
+        pattern = f"%{term}%"
+        conditions.append(or_(Bookmark.url.ilike(pattern), Bookmark.body.ilike(pattern)))
+    return (
+        select(*BOOKMARK_COLUMNS)
+        .where(Bookmark.user_id == user_id, and_(*conditions))
+        .order_by(Bookmark.id.desc())
+    )
+
+
+def count_query(user_id, terms, use_fts, by_owner=False):
+    """Return a select counting every match of ``terms`` for ``user_id``."""
+    if use_fts and by_owner:
+        return select(func.count()).select_from(fts).where(_match(terms, user_id))
+    if use_fts:
+        return (
+            select(func.count())
+            .select_from(fts)
+            .join(Bookmark, Bookmark.id == fts.c.rowid)
+            .where(_match(terms), Bookmark.user_id == user_id)
+        )
+    return select(func.count()).select_from(search_query(user_id, terms, False).subquery())
@@ -0,0 +1,41 @@
+"""Compact serialization of bookmarks for JSON responses."""
+from operator import attrgetter
+
+from sqlalchemy.engine import Row
+
+from src.database import Bookmark
+from src.visits import visit_counter
+
+BOOKMARK_FIELDS = (
+    'id', 'url', 'short_url', 'visits', 'body', 'created_at', 'updated_at'
+)
+# Use with select(*BOOKMARK_COLUMNS) to skip ORM hydration entirely.
+BOOKMARK_COLUMNS = tuple(getattr(Bookmark, field) for field in BOOKMARK_FIELDS)
+
+
+_instance_values = attrgetter(*BOOKMARK_FIELDS)
+
+
+def _record(values, pending):
+    """Return the API dict for ``values`` in ``BOOKMARK_FIELDS`` order."""
+    record = dict(zip(BOOKMARK_FIELDS, values))
+    record['visits'] = (record['visits'] or 0) + pending.get(record['short_url'], 0)
+    return record
+
+
+def serialize_bookmark(bookmark):
+    """Return the API representation of a Bookmark instance or column row."""
+    return serialize_bookmarks((bookmark,))[0]
+
+
+def serialize_bookmarks(bookmarks):
+    """Return the API representation of many Bookmark instances or rows.
+
+    Works on ORM instances and on rows selected with ``BOOKMARK_COLUMNS``.
+    Pending buffered visits are looked up from a single snapshot.
+    """
+    pending = visit_counter.pending_items()
+    return [
+        _record(bookmark if isinstance(bookmark, Row) else _instance_values(bookmark), pending)
+        for bookmark in bookmarks
+    ]
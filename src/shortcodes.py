@@ -0,0 +1,205 @@
+"""Collision-free short URL code allocation.
+
+Codes are derived from a monotonically increasing sequence stored in the
+``short_code_sequence`` table. Each process reserves a block of sequence
+values with a single UPDATE and then hands out codes from that block in
+memory, so allocating a code needs no database round-trip and can never
+collide with a code handed out by another process or another app node
+sharing the database: the UPDATE is the only point of coordination, and
+it happens once per ``SHORT_CODE_BLOCK_SIZE`` codes rather than per
+insert. ``python -m benchmarks.bench_multinode_codes`` checks this with
+several independent app processes.
+
+A sequence value is mapped to a base62 code whose length grows with the
+sequence: the first 62**3 values produce 3-character codes, the next 62**4
+produce 4-character codes, and so on. Within each length the value is
+scrambled with a multiplicative permutation so that consecutive bookmarks
+do not get consecutive codes.
+
+A block is abandoned once it is ``SHORT_CODE_BLOCK_MAX_AGE`` seconds old,
+so a code is always handed out shortly after its block was reserved. The
+short code Bloom filter in ``src.bloom`` relies on this bound.
+"""
+import functools
+import os
+import string
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from src.database import Bookmark, ShortCodeSequence, db
+
+ALPHABET = string.digits + string.ascii_letters
+BASE = len(ALPHABET)
+DIGITS = {char: value for value, char in enumerate(ALPHABET)}
+MIN_LENGTH = 3
+# Prime, hence coprime with every power of 62 (= 2 * 31).
+MULTIPLIER = 1_580_030_173
+SEQUENCE_ID = 1
+
+
+def _band(value):
+    """Return (length, offset within that length) for a sequence value."""
+    length = MIN_LENGTH
+    size = BASE ** length
+    while value >= size:
+        value -= size
+        length += 1
+        size = BASE ** length
+    return length, value
+
+
+def band_start(length):
+    """Return the first sequence value that yields codes of ``length``."""
+    return sum(BASE ** width for width in range(MIN_LENGTH, length))
+
+
+def encode(value, length):
+    """Encode ``value`` in base62, left-padded to ``length`` characters."""
+    chars = []
+    for _ in range(length):
+        value, remainder = divmod(value, BASE)
+        chars.append(ALPHABET[remainder])
+    return "".join(reversed(chars))
+
+
+def sequence_to_code(value):
+    """Map a sequence value to its short URL code."""
+    length, offset = _band(value)
+    return encode(offset * MULTIPLIER % BASE ** length, length)
+
+
+@functools.lru_cache(maxsize=None)
+def _unscramble(length):
+    """Return (band start, inverse multiplier, band size) for ``length``."""
+    size = BASE ** length
+    return band_start(length), pow(MULTIPLIER, -1, size), size
+
+
+def code_to_sequence(code):
+    """Map a short URL code back to its sequence value, or None."""
+    if len(code) < MIN_LENGTH:
+        return None
+    scrambled = 0
+    for char in code:
+        digit = DIGITS.get(char)
+        if digit is None:
+            return None
+        scrambled = scrambled * BASE + digit
+    start, inverse, size = _unscramble(len(code))
+    return start + scrambled * inverse % size
+
+
+def current_sequence(conn):
+    """Return the next unreserved sequence value, or None if none was reserved."""
+    table = ShortCodeSequence.__table__
+    return conn.execute(
+        select(table.c.next_value).where(table.c.id == SEQUENCE_ID)
+    ).scalar()
+
+
+class ShortCodeAllocator:
+    """Hand out short URL codes from blocks reserved in the database."""
+
+    def __init__(self, block_size=100, max_age=300):
+        self.block_size = block_size
+        self.max_age = max_age
+        self._next = 0
+        self._end = 0
+        self._expires_at = 0.0
+        self._pid = None
+        self._reserved = None
+        self._lock = threading.Lock()
+        self.blocks_reserved = 0
+
+    def init_app(self, app):
+        """Configure the block size and age from the Flask app config."""
+        app.config.setdefault("SHORT_CODE_BLOCK_SIZE", 100)
+        app.config.setdefault("SHORT_CODE_BLOCK_MAX_AGE", 300)
+        with self._lock:
+            self.block_size = int(app.config["SHORT_CODE_BLOCK_SIZE"])
+            self.max_age = float(app.config["SHORT_CODE_BLOCK_MAX_AGE"])
+            self._next = self._end = 0
+            self._reserved = None
+
+    def allocate(self):
+        """Return one unused short URL code."""
+        return self.allocate_many(1)[0]
+
+    def allocate_many(self, count):
+        """Return ``count`` unused short URL codes."""
+        codes = []
+        with self._lock:
+            if self._pid != os.getpid():
+                # Never reuse a block inherited from a parent process.
+                self._pid = os.getpid()
+                self._next = self._end = 0
+            if self._reserved is None:
+                self._reserved = self._reserved_codes()
+            while len(codes) < count:
+                if self._next >= self._end or time.monotonic() >= self._expires_at:
+                    needed = count - len(codes)
+                    self._next, self._end = self._reserve(max(needed, self.block_size))
+                    self._expires_at = time.monotonic() + self.max_age
+                code = sequence_to_code(self._next)
+                self._next += 1
+                if code not in self._reserved:
+                    codes.append(code)
+        return codes
+
+    def _reserve(self, size):
+        """Atomically reserve ``size`` sequence values; return (start, end)."""
+        table = ShortCodeSequence.__table__
+        while True:
+            with db.engine.begin() as conn:
+                stmt = (
+                    update(table)
+                    .where(table.c.id == SEQUENCE_ID)
+                    .values(next_value=table.c.next_value + size)
+                )
+                if conn.dialect.update_returning:
+                    end = conn.execute(stmt.returning(table.c.next_value)).scalar()
+                elif conn.execute(stmt).rowcount:
+                    end = conn.execute(
+                        select(table.c.next_value).where(table.c.id == SEQUENCE_ID)
+                    ).scalar_one()
+                else:
+                    end = None
+                if end is not None:
+                    self.blocks_reserved += 1
+                    return end - size, end
+            try:
+                with db.engine.begin() as conn:
+                    conn.execute(
+                        insert(table).values(
+                            id=SEQUENCE_ID, next_value=self._initial_value(conn)
+                        )
+                    )
+            except IntegrityError:
+                # Another process created the sequence row first.
+                pass
+
+    @staticmethod
+    def _initial_value(conn):
+        """Return the first sequence value for a freshly created sequence.
+
+        Tables that already hold randomly generated 3-character codes start
+        at the 4-character range so new codes cannot collide with them.
+        """
+        existing = conn.execute(select(func.count()).select_from(Bookmark.__table__))
+        return band_start(MIN_LENGTH + 1) if existing.scalar_one() else 0
+
+    @staticmethod
+    def _reserved_codes():
+        """Return top-level route names that a short code must not shadow."""
+        return {
+            rule.rule.strip("/")
+            for rule in current_app.url_map.iter_rules()
+            if rule.rule.count("/") == 1 and "<" not in rule.rule
+        }
+
+
+short_codes = ShortCodeAllocator()
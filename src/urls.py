@@ -0,0 +1,45 @@
+"""URL normalization and digests used for duplicate detection."""
+import hashlib
+from urllib.parse import urlsplit, urlunsplit
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url):
+    """Return a canonical form of ``url`` for duplicate detection.
+
+    The scheme and host are lowercased, default ports and trailing slashes
+    are dropped; the rest of the URL is kept as given.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").rstrip(".")
+    if ":" in host:
+        host = f"[{host}]"
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    if port is not None and port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+    if parts.username is not None:
+        userinfo = parts.username
+        if parts.password is not None:
+            userinfo = f"{userinfo}:{parts.password}"
+        host = f"{userinfo}@{host}"
+    path = parts.path.rstrip("/")
+    return urlunsplit((scheme, host, path, parts.query, parts.fragment))
+
+
+def is_valid_url(url):
+    """Return True if ``url`` is a well-formed absolute URL.
+
+    ``validators`` is imported on first use; it is not needed to start up.
+    """
+    import validators  # pylint: disable=import-outside-toplevel
+    return bool(validators.url(url))
+
+
+def url_digest(url):
+    """Return the hex SHA-256 digest of the normalized ``url``."""
+    return hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
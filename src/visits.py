@@ -0,0 +1,199 @@
+"""Visit accounting for short URL redirects.
+
+With ``VISIT_BUFFERING`` enabled, increments are collected in memory and
+written back in bulk, either every ``VISIT_FLUSH_INTERVAL`` seconds or
+once ``VISIT_FLUSH_THRESHOLD`` distinct codes are pending, and once more
+when the process exits. It defaults to on whenever the redirect cache is
+(``REDIRECT_CACHE_SIZE`` > 0), so a cached redirect never touches
+SQLAlchemy. With it off every redirect increments ``Bookmark.visits`` and
+the owner's counters in its own transaction, and cache hits stay bound by
+that write.
+"""
+import logging
+import threading
+from collections import Counter
+
+from sqlalchemy import bindparam, select, update
+
+from src.database import Bookmark, User, bump_data_version, db
+from src.workers import BackgroundWorker, flush_at_exit
+
+logger = logging.getLogger(__name__)
+
+OWNER_QUERY_CHUNK = 500
+
+
+def write_visits(conn, visits):
+    """Apply ``visits`` (code -> increment) and their owners' counters.
+
+    Bumps the data version and ``total_visits`` of every user owning one
+    of the updated bookmarks. Owners are read back after the bookmark
+    UPDATE, so visits to a bookmark deleted in the meantime (say, while
+    another process still buffered them) are dropped for both counters.
+
+    Runs two executemany UPDATEs and a chunked SELECT on ``conn``; shared
+    by the buffered flusher here and by the standalone redirect server.
+    """
+    bookmarks = Bookmark.__table__
+    users_table = User.__table__
+    conn.execute(
+        update(bookmarks)
+        .where(bookmarks.c.short_url == bindparam("code"))
+        .values(visits=bookmarks.c.visits + bindparam("increment")),
+        [{"code": code, "increment": increment} for code, increment in visits.items()]
+    )
+    # The rows just updated stay locked (or, on SQLite, the database
+    # does) until commit, so these are exactly the bookmarks counted.
+    users = Counter()
+    codes = list(visits)
+    for offset in range(0, len(codes), OWNER_QUERY_CHUNK):
+        for code, user_id in conn.execute(
+            select(bookmarks.c.short_url, bookmarks.c.user_id)
+            .where(bookmarks.c.short_url.in_(codes[offset:offset + OWNER_QUERY_CHUNK]))
+        ):
+            users[user_id] += visits[code]
+    if users:
+        conn.execute(
+            update(users_table)
+            .where(users_table.c.id == bindparam("user"))
+            .values(
+                data_version=users_table.c.data_version + 1,
+                total_visits=users_table.c.total_visits + bindparam("increment"),
+                updated_at=users_table.c.updated_at,
+            ),
+            [{"user": user_id, "increment": increment} for user_id, increment in users.items()]
+        )
+
+
+class VisitCounter:
+    """Record redirect visits either immediately or in buffered batches."""
+
+    def __init__(self):
+        self.app = None
+        self.buffered = False
+        self.flush_interval = 5.0
+        self.flush_threshold = 1000
+        self._pending = Counter()
+        self._pending_users = Counter()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._worker = BackgroundWorker(
+            "visit-flusher", self._run, self._lock, on_fork=self._forget_parent
+        )
+        self.flushes = 0
+        self.flushed_visits = 0
+
+    def init_app(self, app):
+        """Configure visit accounting from the Flask app config."""
+        app.config.setdefault(
+            "VISIT_BUFFERING", int(app.config.get("REDIRECT_CACHE_SIZE", 10000)) > 0
+        )
+        app.config.setdefault("VISIT_FLUSH_INTERVAL", 5.0)
+        app.config.setdefault("VISIT_FLUSH_THRESHOLD", 1000)
+        self.app = app
+        self.buffered = bool(app.config["VISIT_BUFFERING"])
+        self.flush_interval = float(app.config["VISIT_FLUSH_INTERVAL"])
+        self.flush_threshold = int(app.config["VISIT_FLUSH_THRESHOLD"])
+        if self.buffered:
+            flush_at_exit(self.flush)
+
+    def record(self, short_url, user_id=None, count=1):
+        """Count ``count`` visits to ``short_url``, owned by ``user_id``."""
+        if not self.buffered:
+            updated = db.session.execute(
+                update(Bookmark)
+                .where(Bookmark.short_url == short_url)
+                .values(visits=Bookmark.visits + count)
+            ).rowcount
+            if updated and user_id is not None:
+                bump_data_version(user_id, visits=count)
+            db.session.commit()
+            return
+
+        self._worker.ensure_started()
+        with self._lock:
+            self._pending[short_url] += count
+            if user_id is not None:
+                self._pending_users[int(user_id)] += count
+            full = len(self._pending) >= self.flush_threshold
+        if full:
+            self._wake.set()
+
+    def discard(self, short_url, user_id=None):
+        """Drop unflushed visits to ``short_url``, e.g. when it is deleted."""
+        with self._lock:
+            count = self._pending.pop(short_url, 0)
+            if count and user_id is not None:
+                self._pending_users[int(user_id)] -= count
+                if self._pending_users[int(user_id)] <= 0:
+                    del self._pending_users[int(user_id)]
+
+    def pending(self, short_url):
+        """Return visits to ``short_url`` that have not been flushed yet."""
+        with self._lock:
+            return self._pending.get(short_url, 0)
+
+    def pending_for_user(self, user_id):
+        """Return unflushed visits to any bookmark of ``user_id``."""
+        with self._lock:
+            return self._pending_users.get(int(user_id), 0)
+
+    def pending_items(self):
+        """Return a snapshot of all pending increments by short code."""
+        with self._lock:
+            return dict(self._pending)
+
+    def total(self, short_url, visits):
+        """Return the stored ``visits`` plus any pending increments."""
+        return (visits or 0) + self.pending(short_url)
+
+    def flush(self):
+        """Write all pending increments with one UPDATE per short code."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                batch, self._pending = self._pending, Counter()
+                users, self._pending_users = self._pending_users, Counter()
+
+            try:
+                with self.app.app_context():
+                    with db.engine.begin() as conn:
+                        write_visits(conn, batch)
+            except Exception:  # pylint: disable=broad-exception-caught
+                logger.exception("Visit flush failed; re-queueing %d codes", len(batch))
+                with self._lock:
+                    self._pending.update(batch)
+                    self._pending_users.update(users)
+                return 0
+
+            self.flushes += 1
+            self.flushed_visits += sum(batch.values())
+            return len(batch)
+
+    def stats(self):
+        """Return buffering counters."""
+        with self._lock:
+            return {
+                "buffered": self.buffered,
+                "pending_codes": len(self._pending),
+                "pending_visits": sum(self._pending.values()),
+                "flushes": self.flushes,
+                "flushed_visits": self.flushed_visits,
+            }
+
+    def _forget_parent(self):
+        """Drop increments inherited from the parent; they are its to flush."""
+        self._pending = Counter()
+        self._pending_users = Counter()
+
+    def _run(self):
+        """Flush on every interval tick or when the size threshold is hit."""
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+
+visit_counter = VisitCounter()
@@ -0,0 +1,52 @@
+"""Background threads started lazily, once per (forked) process.
+
+The visit flusher, the analytics rollup and the Bloom filter rebuild each
+run on a daemon thread. A pre-forking server imports the app in its
+master and forks workers, and a forked child inherits no running thread,
+so each one is started on first use in whichever process uses it.
+"""
+import atexit
+import os
+import threading
+
+_exit_callbacks = set()
+_exit_lock = threading.Lock()
+
+
+class BackgroundWorker:
+    """Run ``target`` on a daemon thread started once per process.
+
+    ``lock`` is the owner's state lock; ``on_fork``, if given, runs under
+    it before a forked child starts its own thread, so the owner can drop
+    state inherited from the parent.
+    """
+
+    def __init__(self, name, target, lock, on_fork=None):
+        self.name = name
+        self.target = target
+        self.on_fork = on_fork
+        self._lock = lock
+        self._thread = None
+        self._pid = None
+
+    def ensure_started(self):
+        """Start the thread unless this process already has it."""
+        pid = os.getpid()
+        if self._thread is not None and self._pid == pid:
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == pid:
+                return
+            if self._pid is not None and self.on_fork is not None:
+                self.on_fork()
+            self._pid = pid
+            self._thread = threading.Thread(target=self.target, name=self.name, daemon=True)
+            self._thread.start()
+
+
+def flush_at_exit(callback):
+    """Register ``callback`` with ``atexit`` unless it already is."""
+    with _exit_lock:
+        if callback not in _exit_callbacks:
+            _exit_callbacks.add(callback)
+            atexit.register(callback)
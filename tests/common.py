@@ -0,0 +1,66 @@
+"""Shared set-up for tests that run against a real app and database."""
+import os
+import tempfile
+import unittest
+
+from src import create_app
+from src.database import db
+
+
+class AppTestCase(unittest.TestCase):
+    """Run each test against a fresh app on its own SQLite file.
+
+    Subclasses override ``config`` (or ``app_config``) to change settings.
+    The app context is pushed for the duration of the test, so ``db`` can
+    be used directly.
+    """
+
+    config = {}
+
+    def app_config(self):
+        """Return the settings that override the defaults below."""
+        return self.config
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.database = os.path.join(self.tmp.name, "test.db")
+        self.app = create_app({
+            "SECRET_KEY": "test",
+            "JWT_SECRET_KEY": "test" * 8,
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{self.database}",
+            "PASSWORD_HASH_METHOD": "pbkdf2:sha256:1000",
+            "PASSWORD_HASH_WORKERS": 0,
+            "ANALYTICS_ENABLED": False,
+            "VISIT_BUFFERING": False,
+            "BLOOM_FILTER_REBUILD_INTERVAL": 3600,
+            **self.app_config(),
+        })
+        self.client = self.app.test_client()
+        self.context = self.app.app_context()
+        self.context.push()
+
+    def tearDown(self):
+        db.session.remove()
+        db.engine.dispose()
+        self.context.pop()
+        self.tmp.cleanup()
+
+    def login(self, username="alice"):
+        """Register ``username`` and return its authorization headers."""
+        email = f"{username}@example.com"
+        response = self.client.post("/api/v1/auth/register", json={
+            "username": username, "email": email, "password": "secret1",
+        })
+        self.assertEqual(response.status_code, 201, response.get_json())
+        response = self.client.post("/api/v1/auth/login", json={
+            "email": email, "password": "secret1",
+        })
+        return {"Authorization": f"Bearer {response.get_json()['user']['access']}"}
+
+    def create(self, headers, url, body=""):
+        """Create a bookmark through the API and return its JSON."""
+        response = self.client.post(
+            "/api/v1/bookmarks/", json={"url": url, "body": body}, headers=headers
+        )
+        self.assertEqual(response.status_code, 201, response.get_json())
+        return response.get_json()
@@ -0,0 +1,84 @@
+"""Tests for the single and batch bookmark edit endpoints."""
+from tests.common import AppTestCase
+
+
+class TestBatchEndpoints(AppTestCase):
+    """PATCH and DELETE /bookmarks/batch."""
+
+    def setUp(self):
+        super().setUp()
+        self.headers = self.login("alice")
+        self.ids = [
+            self.create(self.headers, f"https://example.com/{index}")["id"]
+            for index in range(3)
+        ]
+        other = self.login("bob")
+        self.foreign_id = self.create(other, "https://example.org/")["id"]
+
+    def batch(self, method, payload):
+        """Send ``payload`` to the batch endpoint with ``method``."""
+        return self.client.open("/api/v1/bookmarks/batch", method=method,
+                                json=payload, headers=self.headers)
+
+    def bodies(self):
+        """Return the current user's bookmark bodies by id."""
+        response = self.client.get("/api/v1/bookmarks/?per_page=50", headers=self.headers)
+        return {item["id"]: item["body"] for item in response.get_json()["data"]}
+
+    def test_update(self):
+        """Owned ids are updated in one go; missing and foreign ids are reported."""
+        response = self.batch("PATCH", {"ids": self.ids[:2] + [self.foreign_id, 999],
+                                        "body": "tagged"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json(), {
+            "updated": sorted(self.ids[:2]),
+            "not_found": sorted([self.foreign_id, 999]),
+        })
+        bodies = self.bodies()
+        self.assertEqual([bodies[bookmark_id] for bookmark_id in self.ids],
+                         ["tagged", "tagged", ""])
+
+    def test_delete(self):
+        """Owned ids are deleted and the counters follow; others are left alone."""
+        response = self.batch("DELETE", {"ids": [self.ids[0], self.foreign_id, 999]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json(), {
+            "deleted": [self.ids[0]],
+            "not_found": sorted([self.foreign_id, 999]),
+        })
+        self.assertEqual(sorted(self.bodies()), sorted(self.ids[1:]))
+        stats = self.client.get("/api/v1/bookmarks/stats", headers=self.headers).get_json()
+        self.assertEqual(stats["summary"]["bookmark_count"], 2)
+
+    def test_rejects_bad_batches(self):
+        """Malformed ids, URL edits and non-string bodies are 400s."""
+        for method, payload in (
+            ("PATCH", {"ids": [], "body": "x"}),
+            ("PATCH", {"ids": ["1"], "body": "x"}),
+            ("PATCH", {"ids": [True], "body": "x"}),
+            ("PATCH", [self.ids[0]]),
+            ("PATCH", {"ids": self.ids, "url": "https://example.com/"}),
+            ("PATCH", {"ids": self.ids}),
+            ("PATCH", {"ids": self.ids, "body": {"x": 1}}),
+            ("DELETE", {"ids": "1"}),
+        ):
+            response = self.batch(method, payload)
+            self.assertEqual(response.status_code, 400, (method, payload))
+        self.assertEqual(set(self.bodies().values()), {""})
+
+    def test_rejects_bad_single_edits(self):
+        """PUT/PATCH of one bookmark reject non-objects and bad field types."""
+        path = f"/api/v1/bookmarks/{self.ids[0]}"
+        for method, payload in (
+            ("PATCH", {"body": [1, 2]}),
+            ("PATCH", {"url": 5}),
+            ("PUT", ["https://example.com/"]),
+            ("PUT", {"url": "https://example.net/", "body": 3}),
+        ):
+            response = self.client.open(path, method=method, json=payload,
+                                        headers=self.headers)
+            self.assertEqual(response.status_code, 400, (method, payload))
+
+        response = self.client.patch(path, json={"body": None}, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.get_json()["body"])
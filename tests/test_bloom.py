@@ -0,0 +1,51 @@
+"""Tests for the short code Bloom filter."""
+from datetime import datetime, timedelta
+
+from src.bloom import bookmark_filter
+from src.database import Bookmark, User, db
+from src.shortcodes import ShortCodeAllocator, sequence_to_code
+from tests.common import AppTestCase
+
+
+class TestMightHaveCode(AppTestCase):
+    """Codes allocated after a build must still reach the database."""
+
+    config = {"SHORT_CODE_BLOCK_SIZE": 10}
+
+    def setUp(self):
+        super().setUp()
+        user = User(username="bloom", email="bloom@example.com", password="x")
+        db.session.add(user)
+        db.session.commit()
+        # Old enough to settle, so the filter answers for codes below them.
+        created_at = datetime.now() - timedelta(days=1)
+        db.session.add_all(
+            Bookmark(url=f"https://example.com/{index}", user_id=user.id, created_at=created_at)
+            for index in range(50)
+        )
+        db.session.commit()
+        bookmark_filter.rebuild()
+
+    def test_code_allocated_after_build_is_never_missing(self):
+        """Codes from this and another node after the build are not ruled out."""
+        floor = bookmark_filter.stats()["sequence_floor"]
+        self.assertGreater(floor, 0)
+        self.assertTrue(bookmark_filter.might_have_code(Bookmark.query.first().short_url))
+        # Caches the watermark before the other node reserves its block.
+        bookmark_filter.might_have_code(sequence_to_code(floor))
+
+        other_node = ShortCodeAllocator(block_size=1000)
+        codes = other_node.allocate_many(1500)
+        codes += [Bookmark(url="https://example.org/", user_id=1).short_url]
+        for code in codes:
+            self.assertTrue(bookmark_filter.might_have_code(code), code)
+
+    def test_unallocated_code_is_missing(self):
+        """A code far past the sequence is answered without the database."""
+        floor = bookmark_filter.stats()["sequence_floor"]
+        self.assertFalse(bookmark_filter.might_have_code(sequence_to_code(floor + 10**6)))
+        self.assertFalse(bookmark_filter.might_have_code("0" * 17))
+
+
+if __name__ == "__main__":
+    unittest.main()
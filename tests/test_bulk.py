@@ -0,0 +1,54 @@
+"""Tests for bulk bookmark import."""
+from sqlalchemy import insert
+
+from src.bloom import bookmark_filter
+from src.database import Bookmark, db
+from src.shortcodes import ShortCodeAllocator
+from src.urls import url_digest
+from tests.common import AppTestCase
+
+
+class TestBulkImport(AppTestCase):
+    """Per-item outcomes of POST /bookmarks/bulk."""
+
+    def setUp(self):
+        super().setUp()
+        self.headers = self.login()
+        self.create(self.headers, "https://example.com/first")
+        bookmark_filter.rebuild()
+
+    def bulk(self, items):
+        """Post ``items`` to the bulk endpoint and return the response."""
+        return self.client.post("/api/v1/bookmarks/bulk", json=items, headers=self.headers)
+
+    def test_per_item_outcomes(self):
+        """Created, duplicate and invalid items are reported by position."""
+        response = self.bulk([
+            "https://example.com/a",
+            {"url": "https://example.com/first"},
+            {"url": "https://EXAMPLE.com/a/"},
+            {"url": "not a url"},
+            {"url": "https://example.com/b", "body": ["x"]},
+        ])
+        self.assertEqual(response.status_code, 207)
+        statuses = [item["status"] for item in response.get_json()["data"]]
+        self.assertEqual(statuses, ["created", "duplicate", "duplicate", "invalid", "invalid"])
+        self.assertEqual(response.get_json()["meta"],
+                         {"created": 1, "duplicates": 2, "invalid": 2})
+
+    def test_url_added_by_another_node_after_filter_build(self):
+        """A URL the filter has not seen yet is a per-item duplicate, not a 409."""
+        url = "https://example.com/elsewhere"
+        with db.engine.begin() as conn:
+            conn.execute(insert(Bookmark).values(
+                url=url, url_hash=url_digest(url), body="", visits=0, user_id=1,
+                short_url=ShortCodeAllocator().allocate(),
+            ))
+        self.assertFalse(bookmark_filter.might_have_url(url_digest(url)))
+
+        response = self.bulk([url, "https://example.com/new"])
+        self.assertEqual(response.status_code, 207, response.get_json())
+        statuses = [item["status"] for item in response.get_json()["data"]]
+        self.assertEqual(statuses, ["duplicate", "created"])
+        # The filter now knows the URL, so a retry needs no second attempt.
+        self.assertTrue(bookmark_filter.might_have_url(url_digest(url)))
@@ -0,0 +1,40 @@
+"""Tests for the database maintenance commands."""
+from sqlalchemy import select, text
+
+from src.commands import upgrade_schema
+from src.database import Bookmark, db
+from src.urls import url_digest
+from tests.common import AppTestCase
+
+
+class TestUpgradeSchema(AppTestCase):
+    """``flask upgrade-db`` on a database from before URL digests."""
+
+    def setUp(self):
+        super().setUp()
+        headers = self.login()
+        for url in ("https://example.com/a", "https://example.com/b"):
+            self.create(headers, url)
+        with db.engine.begin() as conn:
+            conn.execute(text("DROP INDEX ix_bookmark_url_hash"))
+            conn.execute(text("ALTER TABLE bookmark DROP COLUMN url_hash"))
+            # Told apart only by normalization, which is what the digest adds.
+            conn.execute(text(
+                "INSERT INTO bookmark (url, body, short_url, visits, user_id) "
+                "VALUES ('HTTPS://example.com/a/', '', 'legacy', 0, 1)"
+            ))
+
+    def test_adding_url_hash_backfills_it(self):
+        """Existing rows get their digest in the same run."""
+        actions = upgrade_schema(db.engine)
+        self.assertIn(("add column", "bookmark.url_hash", None), actions)
+        self.assertIn(("backfill url hash", "2 rows", None), actions)
+        self.assertTrue(any(action == "backfill url hash" and "duplicate" in detail
+                            for action, detail, _ in actions))
+
+        rows = dict(db.session.execute(select(Bookmark.short_url, Bookmark.url_hash)).all())
+        self.assertIsNone(rows.pop("legacy"))
+        self.assertEqual(sorted(rows.values()), sorted(
+            url_digest(url) for url in ("https://example.com/a", "https://example.com/b")
+        ))
+        self.assertEqual(upgrade_schema(db.engine), [])
@@ -0,0 +1,61 @@
+"""Tests for conditional GETs on per-user bookmark reads."""
+from src.visits import visit_counter
+from tests.common import AppTestCase
+
+
+class TestConditionalGet(AppTestCase):
+    """ETags change with every change to the user's bookmarks."""
+
+    config = {"VISIT_BUFFERING": True, "VISIT_FLUSH_INTERVAL": 3600}
+
+    def setUp(self):
+        super().setUp()
+        self.headers = self.login()
+        self.bookmark = self.create(self.headers, "https://example.com/")
+
+    def etag(self, path="/api/v1/bookmarks/"):
+        """GET ``path`` and return its ETag."""
+        response = self.client.get(path, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(response.headers.get("ETag"))
+        return response.headers["ETag"]
+
+    def test_if_none_match(self):
+        """A matching ETag gets an empty 304; a stale one the full body."""
+        for path in ("/api/v1/bookmarks/", "/api/v1/bookmarks/stats",
+                     f"/api/v1/bookmarks/{self.bookmark['id']}"):
+            etag = self.etag(path)
+            response = self.client.get(path, headers={**self.headers, "If-None-Match": etag})
+            self.assertEqual(response.status_code, 304, path)
+            self.assertEqual(response.get_data(), b"")
+            self.assertEqual(response.headers["ETag"], etag)
+
+            response = self.client.get(path, headers={**self.headers,
+                                                      "If-None-Match": 'W/"stale"'})
+            self.assertEqual(response.status_code, 200, path)
+
+    def test_writes_change_the_etag(self):
+        """Create, edit, delete and a visit flush each give a new ETag."""
+        seen = [self.etag()]
+        self.assertEqual(self.etag(), seen[0])
+
+        other = self.create(self.headers, "https://example.org/")
+        seen.append(self.etag())
+        self.client.patch(f"/api/v1/bookmarks/{other['id']}", json={"body": "edited"},
+                          headers=self.headers)
+        seen.append(self.etag())
+        self.client.delete(f"/api/v1/bookmarks/{other['id']}", headers=self.headers)
+        seen.append(self.etag())
+
+        self.assertEqual(self.client.get(f"/{self.bookmark['short_url']}").status_code, 302)
+        seen.append(self.etag())
+        self.assertEqual(visit_counter.flush(), 1)
+        seen.append(self.etag())
+        self.assertEqual(self.etag(), seen[-1])
+        self.assertEqual(len(set(seen)), len(seen))
+
+    def test_other_users_writes_keep_the_etag(self):
+        """ETags are per user; another user's writes leave them alone."""
+        etag = self.etag()
+        self.create(self.login("bob"), "https://example.net/")
+        self.assertEqual(self.etag(), etag)
@@ -0,0 +1,78 @@
+"""Tests for cursor pagination of the bookmark list."""
+from src.bookmarks import encode_cursor
+from src.database import Bookmark, db
+from tests.common import AppTestCase
+
+
+class TestCursorPagination(AppTestCase):
+    """GET /bookmarks/?cursor=..."""
+
+    def setUp(self):
+        super().setUp()
+        self.headers = self.login()
+        self.ids = [self.create(self.headers, f"https://example.com/{index}")["id"]
+                    for index in range(5)]
+
+    def page(self, cursor="", per_page=2, **params):
+        """Fetch one cursor page and return the response."""
+        return self.client.get("/api/v1/bookmarks/", headers=self.headers,
+                               query_string={"cursor": cursor, "per_page": per_page,
+                                             **params})
+
+    def walk(self, cursor="", per_page=2):
+        """Return the ids of every page from ``cursor`` on, following ``next_cursor``."""
+        ids = []
+        while cursor is not None:
+            body = self.page(cursor, per_page).get_json()
+            ids.extend(item["id"] for item in body["data"])
+            cursor = body["meta"]["next_cursor"]
+        return ids
+
+    def test_first_next_and_last_page(self):
+        """Pages follow creation order and the last one has no cursor."""
+        first = self.page(include_total=1).get_json()
+        self.assertEqual([item["id"] for item in first["data"]], self.ids[:2])
+        self.assertTrue(first["meta"]["has_next"])
+        self.assertEqual(first["meta"]["total_count"], 5)
+
+        second = self.page(first["meta"]["next_cursor"]).get_json()
+        self.assertEqual([item["id"] for item in second["data"]], self.ids[2:4])
+        self.assertNotIn("total_count", second["meta"])
+
+        last = self.page(second["meta"]["next_cursor"]).get_json()
+        self.assertEqual([item["id"] for item in last["data"]], self.ids[4:])
+        self.assertEqual(last["meta"], {"per_page": 2, "next_cursor": None,
+                                        "has_next": False})
+        self.assertEqual(self.walk(per_page=5), self.ids)
+
+    def test_inserts_between_pages(self):
+        """Rows added mid-walk are neither skipped nor repeated."""
+        first = self.page().get_json()
+        added = self.create(self.headers, "https://example.com/late")["id"]
+        self.client.delete(f"/api/v1/bookmarks/{self.ids[0]}", headers=self.headers)
+        rest = self.walk(first["meta"]["next_cursor"])
+        self.assertEqual([item["id"] for item in first["data"]] + rest,
+                         self.ids + [added])
+
+    def test_encode_cursor_matches_next_cursor(self):
+        """A cursor built for a bookmark resumes right after it."""
+        first = self.page().get_json()
+        bookmark = db.session.get(Bookmark, self.ids[1])
+        self.assertEqual(encode_cursor(bookmark), first["meta"]["next_cursor"])
+
+    def test_bad_cursor(self):
+        """A cursor that does not decode is a 400."""
+        for cursor in ("not-a-cursor", "bm90IGpzb24", "WzFd"):
+            response = self.page(cursor)
+            self.assertEqual(response.status_code, 400, cursor)
+            self.assertEqual(response.get_json()["error"], "Not a valid pagination cursor.")
+
+    def test_bad_per_page(self):
+        """A non-positive page size is reported as such, cursor or not."""
+        first = self.page().get_json()
+        for cursor in ("", first["meta"]["next_cursor"]):
+            for per_page in (0, -1):
+                response = self.page(cursor, per_page)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.get_json()["error"],
+                                 "per_page must be a positive integer.")
@@ -0,0 +1,57 @@
+"""Tests for read routing to a replica."""
+import os
+import sqlite3
+from unittest import mock
+
+from src.database import db
+from src.replicas import REPLICA_BIND, read_router
+from tests.common import AppTestCase
+
+
+class TestReadYourWrites(AppTestCase):
+    """Reads after a write go to the primary, whichever worker serves them."""
+
+    def app_config(self):
+        self.replica = os.path.join(self.tmp.name, "replica.db")
+        return {"READ_REPLICA_URI": f"sqlite:///{self.replica}"}
+
+    def setUp(self):
+        super().setUp()
+        self.headers = self.login()
+        # A snapshot taken before the write below, so the replica lags.
+        with sqlite3.connect(self.database) as source, \
+                sqlite3.connect(self.replica) as target:
+            source.backup(target)
+        response = self.client.post("/api/v1/bookmarks/", headers=self.headers,
+                                    json={"url": "https://example.com/"})
+        self.assertEqual(response.status_code, 201)
+        self.assertIsNotNone(self.client.get_cookie(read_router.cookie_name))
+
+    def tearDown(self):
+        super().tearDown()
+        # db keeps one metadata per bind it has seen; later apps have no replica.
+        db.metadatas.pop(REPLICA_BIND, None)
+
+    def listed(self):
+        """Return the number of bookmarks a fresh worker would list."""
+        # Another worker has no in-memory record of the write.
+        with mock.patch.object(read_router, "_recent_writes", {}):
+            response = self.client.get("/api/v1/bookmarks/", headers=self.headers)
+        return len(response.get_json()["data"])
+
+    def test_cookie_pins_reads_to_primary(self):
+        """The pin cookie routes the next read to the primary."""
+        self.assertEqual(self.listed(), 1)
+
+    def test_without_cookie_reads_use_replica(self):
+        """Without the cookie, or with a forged one, reads go to the replica."""
+        self.client.delete_cookie(read_router.cookie_name)
+        self.assertEqual(self.listed(), 0)
+        self.client.set_cookie(read_router.cookie_name, "1")
+        self.assertEqual(self.listed(), 0)
+
+    def test_same_worker_pins_without_cookie(self):
+        """The worker that served the write pins the user on its own."""
+        self.client.delete_cookie(read_router.cookie_name)
+        response = self.client.get("/api/v1/bookmarks/", headers=self.headers)
+        self.assertEqual(len(response.get_json()["data"]), 1)
@@ -0,0 +1,48 @@
+"""Tests for bookmark search."""
+from unittest import mock
+
+from src import search
+from src.database import db
+from src.search import fts_available
+from tests.common import AppTestCase
+
+
+class TestSearch(AppTestCase):
+    """Searches through the FTS5 index."""
+
+    def setUp(self):
+        super().setUp()
+        self.headers = self.login("alice")
+        self.create(self.headers, "https://example.com/python", "snakes and ladders")
+        self.create(self.headers, "https://example.com/rust", "crabs")
+        self.create(self.login("bob"), "https://example.org/python", "more snakes")
+
+    def search(self, query):
+        """Return the URLs found for ``query`` by the current user."""
+        response = self.client.get("/api/v1/bookmarks/search", query_string={"q": query},
+                                   headers=self.headers)
+        self.assertEqual(response.status_code, 200, response.get_json())
+        return sorted(item["url"] for item in response.get_json()["data"])
+
+    def test_finds_only_own_bookmarks(self):
+        """Terms match URL and body, only among the user's bookmarks."""
+        self.assertEqual(self.search("snakes"), ["https://example.com/python"])
+        self.assertEqual(self.search("crab*"), ["https://example.com/rust"])
+        self.assertEqual(self.search("nothing"), [])
+
+
+class TestSearchWithoutFts(TestSearch):
+    """The same searches on a SQLite build without FTS5."""
+
+    def setUp(self):
+        missing = tuple(statement.replace("USING fts5(", "USING no_such_module(")
+                        for statement in search.FTS_DDL)
+        patcher = mock.patch.object(search, "FTS_DDL", missing)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        super().setUp()
+
+    def test_falls_back_to_like(self):
+        """Start-up succeeds and searches use LIKE matching."""
+        self.assertFalse(fts_available(db.engine))
+        self.assertEqual(self.search("python"), ["https://example.com/python"])
@@ -0,0 +1,133 @@
+"""Tests for the short code sequence mapping and allocation."""
+import multiprocessing
+import os
+import tempfile
+import unittest
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+
+from src import create_app
+from src.database import Bookmark, User, db
+from src.shortcodes import (
+    MIN_LENGTH,
+    band_start,
+    code_to_sequence,
+    sequence_to_code,
+    short_codes
+)
+
+PROCESSES = 3
+CODES_PER_PROCESS = 600
+INSERTS_PER_PROCESS = 20
+
+
+def node_config(uri):
+    """Return the app config of one allocating process."""
+    return {
+        "SECRET_KEY": "test",
+        "JWT_SECRET_KEY": "test" * 8,
+        "SQLALCHEMY_DATABASE_URI": uri,
+        "PASSWORD_HASH_WORKERS": 0,
+        "ANALYTICS_ENABLED": False,
+        "VISIT_BUFFERING": False,
+        # Small blocks, so the processes reserve many interleaved ranges.
+        "SHORT_CODE_BLOCK_SIZE": 7,
+    }
+
+
+def allocate_in_process(uri, user_id, barrier, results):
+    """Build an app on ``uri`` and report the codes it hands out.
+
+    Puts ``(codes, conflicts)`` on ``results``, where ``conflicts`` counts
+    inserts rejected by a unique index.
+    """
+    app = create_app(node_config(uri))
+    codes = []
+    conflicts = 0
+    with app.app_context():
+        barrier.wait()
+        for index in range(CODES_PER_PROCESS):
+            codes.append(short_codes.allocate())
+            if index < INSERTS_PER_PROCESS:
+                bookmark = Bookmark(url=f"https://node{os.getpid()}.example.com/{index}",
+                                    body="", user_id=user_id)
+                db.session.add(bookmark)
+                try:
+                    db.session.commit()
+                except IntegrityError:
+                    db.session.rollback()
+                    conflicts += 1
+                    continue
+                codes.append(bookmark.short_url)
+    results.put((codes, conflicts))
+
+
+class TestSequenceCodes(unittest.TestCase):
+    """Round trips between sequence values and codes."""
+
+    def test_round_trip_across_band_boundaries(self):
+        """Values either side of each length change map to codes and back."""
+        for length in (MIN_LENGTH + 1, MIN_LENGTH + 2):
+            start = band_start(length)
+            values = range(start - 100, start + 100)
+            codes = [sequence_to_code(value) for value in values]
+            self.assertEqual(len(set(codes)), len(codes))
+            for value, code in zip(values, codes):
+                self.assertEqual(len(code), length if value >= start else length - 1)
+                self.assertEqual(code_to_sequence(code), value)
+
+    def test_band_edges(self):
+        """The first and last value of the 3-character band round-trip."""
+        for value in (0, band_start(MIN_LENGTH + 1) - 1):
+            self.assertEqual(code_to_sequence(sequence_to_code(value)), value)
+
+    def test_rejects_foreign_codes(self):
+        """Codes too short or outside the alphabet have no sequence value."""
+        self.assertIsNone(code_to_sequence("ab"))
+        self.assertIsNone(code_to_sequence("ab-c"))
+
+
+
+class TestMultiProcessAllocation(unittest.TestCase):
+    """Processes sharing one database never hand out the same code."""
+
+    def test_no_collisions(self):
+        """Codes from concurrent processes on one SQLite file are all unique."""
+        with tempfile.TemporaryDirectory() as tmp:
+            uri = f"sqlite:///{os.path.join(tmp, 'test.db')}"
+            app = create_app(node_config(uri))
+            with app.app_context():
+                user = User(username="nodes", email="nodes@example.com", password="x")
+                db.session.add(user)
+                db.session.commit()
+                user_id = user.id
+
+            context = multiprocessing.get_context("spawn")
+            barrier = context.Barrier(PROCESSES)
+            results = context.Queue()
+            processes = [
+                context.Process(target=allocate_in_process,
+                                args=(uri, user_id, barrier, results))
+                for _ in range(PROCESSES)
+            ]
+            for process in processes:
+                process.start()
+            outcomes = [results.get(timeout=120) for _ in processes]
+            for process in processes:
+                process.join()
+                self.assertEqual(process.exitcode, 0)
+
+            codes = [code for node_codes, _ in outcomes for code in node_codes]
+            self.assertEqual(sum(conflicts for _, conflicts in outcomes), 0)
+            self.assertEqual(len(codes),
+                             PROCESSES * (CODES_PER_PROCESS + INSERTS_PER_PROCESS))
+            self.assertEqual(len(set(codes)), len(codes))
+            with app.app_context():
+                stored = db.session.scalar(select(func.count()).select_from(Bookmark))
+                db.engine.dispose()
+            self.assertEqual(stored, PROCESSES * INSERTS_PER_PROCESS)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+"""Tests for URL normalization."""
+import unittest
+
+from src.urls import normalize_url, url_digest
+
+
+class TestNormalizeUrl(unittest.TestCase):
+    """Equivalent spellings of a URL normalize to the same string."""
+
+    def assertSame(self, first, second):  # pylint: disable=invalid-name
+        """Assert both URLs normalize (and digest) identically."""
+        self.assertEqual(normalize_url(first), normalize_url(second))
+        self.assertEqual(url_digest(first), url_digest(second))
+
+    def test_default_port_is_dropped(self):
+        """The scheme's default port is dropped; any other port is kept."""
+        self.assertSame("http://example.com:80/a", "http://example.com/a")
+        self.assertSame("https://example.com:443/a", "https://example.com/a")
+        self.assertEqual(normalize_url("https://example.com:8443/a"),
+                         "https://example.com:8443/a")
+        self.assertEqual(normalize_url("http://example.com:443/a"),
+                         "http://example.com:443/a")
+
+    def test_scheme_and_host_case(self):
+        """Scheme and host are lowercased; the path keeps its case."""
+        self.assertEqual(normalize_url("HTTPS://Example.COM/Path"),
+                         "https://example.com/Path")
+
+    def test_trailing_slash(self):
+        """Trailing slashes and the host's trailing dot are dropped."""
+        self.assertSame("https://example.com/a/", "https://example.com/a")
+        self.assertSame("https://example.com/", "https://example.com")
+        self.assertSame("https://example.com./a", "https://example.com/a")
+
+    def test_query_and_fragment_are_kept(self):
+        """Only the path loses its trailing slash, not the query."""
+        self.assertEqual(normalize_url("https://example.com/a/?q=1/#f"),
+                         "https://example.com/a?q=1/#f")
+
+    def test_ipv6_host(self):
+        """IPv6 hosts keep their brackets, with or without a port."""
+        self.assertEqual(normalize_url("http://[2001:DB8::1]:80/x/"),
+                         "http://[2001:db8::1]/x")
+        self.assertEqual(normalize_url("http://[2001:db8::1]:8080/x"),
+                         "http://[2001:db8::1]:8080/x")
+
+    def test_userinfo(self):
+        """Userinfo is kept as given, in front of the lowercased host."""
+        self.assertEqual(normalize_url("https://Bob:PW@Example.com:443/"),
+                         "https://Bob:PW@example.com")
+        self.assertEqual(normalize_url("https://bob@example.com:8443"),
+                         "https://bob@example.com:8443")
+        self.assertNotEqual(normalize_url("https://bob@example.com/"),
+                            normalize_url("https://example.com/"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+"""Tests for visit counting on redirects."""
+from unittest import mock
+
+from sqlalchemy import select
+
+from src.database import Bookmark, User, db
+from src.visits import VisitCounter, visit_counter
+from tests.common import AppTestCase
+
+
+class TestBufferedVisits(AppTestCase):
+    """Buffered visits are shown before they are flushed, and counted once."""
+
+    config = {"VISIT_BUFFERING": True, "VISIT_FLUSH_INTERVAL": 3600}
+
+    def setUp(self):
+        super().setUp()
+        self.headers = self.login()
+        self.bookmark = self.create(self.headers, "https://example.com/")
+        self.other = self.create(self.headers, "https://example.org/")
+
+    def visit(self, bookmark, times=1):
+        """Follow ``bookmark``'s short URL ``times`` times."""
+        for _ in range(times):
+            response = self.client.get(f"/{bookmark['short_url']}")
+            self.assertEqual(response.status_code, 302)
+
+    def stored(self):
+        """Return the stored visit counters: per short code and the user total."""
+        db.session.rollback()
+        visits = dict(db.session.execute(select(Bookmark.short_url, Bookmark.visits)).all())
+        return visits, db.session.scalar(select(User.total_visits))
+
+    def shown(self):
+        """Return the visits the API reports for the bookmark and in /stats."""
+        bookmark = self.client.get(f"/api/v1/bookmarks/{self.bookmark['id']}",
+                                   headers=self.headers).get_json()
+        stats = self.client.get("/api/v1/bookmarks/stats", headers=self.headers).get_json()
+        return bookmark["visits"], stats["summary"]["total_visits"]
+
+    def test_pending_visits_are_shown_then_flushed(self):
+        """Visits show up at once and reach the database on flush."""
+        self.visit(self.bookmark, 3)
+        self.assertEqual(self.stored(), ({self.bookmark["short_url"]: 0,
+                                          self.other["short_url"]: 0}, 0))
+        self.assertEqual(visit_counter.pending(self.bookmark["short_url"]), 3)
+        self.assertEqual(self.shown(), (3, 3))
+
+        self.assertEqual(visit_counter.flush(), 1)
+        self.assertEqual(self.stored(), ({self.bookmark["short_url"]: 3,
+                                          self.other["short_url"]: 0}, 3))
+        self.assertEqual(visit_counter.stats()["pending_visits"], 0)
+        self.assertEqual(self.shown(), (3, 3))
+
+    def test_deleted_bookmark_drops_its_pending_visits(self):
+        """Deleting a bookmark discards its unflushed visits."""
+        self.visit(self.bookmark, 2)
+        self.visit(self.other)
+        self.client.delete(f"/api/v1/bookmarks/{self.other['id']}", headers=self.headers)
+        self.assertEqual(visit_counter.pending_for_user(1), 2)
+        visit_counter.flush()
+        self.assertEqual(self.stored(), ({self.bookmark["short_url"]: 2}, 2))
+
+    def test_exit_flush_is_registered_once(self):
+        """Configuring a counter again does not add another exit hook."""
+        counter = VisitCounter()
+        with mock.patch("src.workers.atexit.register") as register:
+            for _ in range(3):
+                counter.init_app(self.app)
+        register.assert_called_once_with(counter.flush)
+
+
+class TestUnbufferedVisits(AppTestCase):
+    """Without buffering every redirect is written at once."""
+
+    def test_visit_is_written_immediately(self):
+        """The bookmark and user counters change in the redirect itself."""
+        headers = self.login()
+        bookmark = self.create(headers, "https://example.com/")
+        self.client.get(f"/{bookmark['short_url']}")
+        self.assertEqual(visit_counter.stats()["pending_visits"], 0)
+        self.assertEqual(db.session.scalar(select(Bookmark.visits)), 1)
+        self.assertEqual(db.session.scalar(select(User.total_visits)), 1)